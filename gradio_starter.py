@@ -1,3 +1,5 @@
+import logging
+import os
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
 from src.ai_doctor import create_app
@@ -21,5 +23,10 @@ else:
 		loaded = True
 
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 demo = create_app()
+if os.environ.get("METRICS_PORT"):
+	# The UI has no FastAPI app of its own; expose its metrics on a side port.
+	from src.ai_doctor import metrics
+	metrics.serve(int(os.environ["METRICS_PORT"]))
 demo.launch(debug=True)
\ No newline at end of file
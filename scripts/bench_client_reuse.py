@@ -0,0 +1,65 @@
+"""Micro-benchmark: per-call latency with and without shared API clients.
+
+Runs ``analyze_text_query`` against a local HTTPS stub. ``reuse`` keeps the
+registry's client (and its keep-alive TLS connections); ``fresh`` clears the
+registry before every call, which is what building ``Groq(...)`` per call did.
+
+Usage:
+    python -m scripts.bench_client_reuse --calls 50
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from scripts.bench_common import emit, summarize
+from scripts.stub_servers import StubServer, self_signed_cert
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server latency in seconds")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cert, key = self_signed_cert(workdir)
+        with StubServer(latency=args.latency, tls_cert=cert, tls_key=key) as stub:
+            os.environ["GROQ_BASE_URL"] = stub.url
+            os.environ["GROQ_API_KEY"] = "bench-key"
+            os.environ["HTTP_CA_BUNDLE"] = cert
+            # Every call repeats the same prompt; without this the reply cache answers them.
+            os.environ["VISION_CACHE_SIZE"] = "0"
+
+            from src.ai_doctor import clients, vision
+
+            clients.HTTP_CA_BUNDLE = cert
+            modes = {}
+            for mode in ("fresh", "reuse"):
+                clients.close_clients()
+                vision.analyze_text_query("warm-up")
+                samples = []
+                for _ in range(args.calls):
+                    if mode == "fresh":
+                        clients.close_clients()
+                    start = time.perf_counter()
+                    vision.analyze_text_query("I have a rash on my arm.")
+                    samples.append(time.perf_counter() - start)
+                modes[mode] = summarize(samples)
+            clients.close_clients()
+
+    emit({
+        "benchmark": "client_reuse",
+        "transport": "https",
+        "stub_latency_s": args.latency,
+        "fresh": modes["fresh"],
+        "reuse": modes["reuse"],
+        "saved_ms_per_call": round(modes["fresh"]["mean_ms"] - modes["reuse"]["mean_ms"], 2),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+import json
+import statistics
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: list[float], wall_s: float | None = None) -> dict:
+    """Latency summary (milliseconds) for a list of per-call durations in seconds."""
+    summary = {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+    if wall_s:
+        summary["wall_s"] = round(wall_s, 3)
+        summary["throughput_per_s"] = round(len(samples) / wall_s, 2)
+    return summary
+
+
+def emit(result: dict, output: str | None = None):
+    """Print ``result`` as JSON and optionally write it to ``output``."""
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
@@ -0,0 +1,100 @@
+"""Benchmark history reads from async code: blocking db calls vs db_async.
+
+Needs a reachable MySQL (see ``scripts/bench_db_writes.py`` for a docker
+one-liner). Seeds one session with ``--messages`` rows, then runs
+``--concurrency`` coroutines that each read a page ``--requests`` times:
+
+- ``blocking``: calls ``db.fetch_messages_page`` directly inside the coroutine
+  (what an ``async def`` FastAPI handler would do without the async variant)
+- ``async``: awaits ``db_async.fetch_messages_page``
+- ``http``: GET /sessions/{id}/messages on the FastAPI app (in-process ASGI)
+
+A ticker coroutine sleeps 10 ms in a loop and records how late it wakes up;
+that event-loop lag is what every other request on the worker would feel.
+
+Usage:
+    DB_PASSWORD=bench python -m scripts.bench_db_async --concurrency 32 --requests 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from scripts.bench_common import emit, summarize
+
+TICK_S = 0.01
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append(max(0.0, time.perf_counter() - start - TICK_S))
+
+
+async def _run_mode(mode: str, session_uuid: str, args, db, db_async, app) -> dict:
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                if mode == "blocking":
+                    db.fetch_messages_page(session_uuid, 0, args.limit)
+                elif mode == "async":
+                    await db_async.fetch_messages_page(session_uuid, 0, args.limit)
+                else:
+                    resp = await client.get(f"/sessions/{session_uuid}/messages", params={"limit": args.limit})
+                    resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    return {"latency": summarize(latencies, wall), "loop_lag": summarize(lags)}
+
+
+async def _main(args):
+    from src.ai_doctor import api, db, db_async
+
+    await db_async.init_db()
+    session_uuid = db.new_session_id()
+    db.save_messages_bulk([(session_uuid, "patient" if i % 2 == 0 else "doctor", f"bench history {i}") for i in range(args.messages)])
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        results[mode] = await _run_mode(mode, session_uuid, args, db, db_async, api.app)
+    return {
+        "benchmark": "db_async",
+        "concurrency": args.concurrency,
+        "requests_per_worker": args.requests,
+        "page_limit": args.limit,
+        "pool_size": db.POOL_SIZE,
+        "results": results,
+        "pool": db.pool_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20, help="reads per concurrent worker")
+    parser.add_argument("--messages", type=int, default=500, help="rows seeded into the benchmark session")
+    parser.add_argument("--limit", type=int, default=50, help="page size per read")
+    parser.add_argument("--modes", default="blocking,async,http")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    emit(asyncio.run(_main(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
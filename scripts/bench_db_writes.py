@@ -0,0 +1,99 @@
+"""Benchmark message inserts/sec: per-call, bulk and write-behind.
+
+Needs a reachable MySQL (the DB_* environment variables from the README), e.g.
+a throwaway local container:
+
+    docker run -d --name ai-doctor-mysql -p 3306:3306 -e MYSQL_ROOT_PASSWORD=bench mysql:8
+    DB_PASSWORD=bench python -m scripts.bench_db_writes --sessions 20 --turns 25
+
+Each simulated turn writes a patient and a doctor message, the way the UI
+logs a turn. ``--concurrency`` threads produce turns in parallel.
+
+- ``per-call``: one ``save_message`` (one borrow + commit) per row
+- ``bulk``: one ``save_messages_bulk`` per turn (both rows, one transaction)
+- ``write-behind``: turns are queued on a ``MessageWriter`` and flushed in batches;
+  the wall time includes the final flush
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.bench_common import emit, summarize
+
+
+def _turn(session_uuid: str, session: int, turn: int) -> list[tuple]:
+    return [
+        (session_uuid, "patient", f"bench patient message {session}/{turn}", None),
+        (session_uuid, "doctor", f"bench doctor reply {session}/{turn} " + "lorem ipsum " * 20, None),
+    ]
+
+
+def _run_mode(mode: str, sessions: list[str], turns: int, concurrency: int, db) -> dict:
+    writer = db.MessageWriter() if mode == "write-behind" else None
+
+    def produce(item):
+        session, session_uuid = item
+        latencies = []
+        for turn in range(turns):
+            messages = _turn(session_uuid, session, turn)
+            start = time.perf_counter()
+            if mode == "per-call":
+                for message in messages:
+                    db.save_message(*message)
+            elif mode == "bulk":
+                db.save_messages_bulk(messages)
+            else:
+                writer.submit_many(messages)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    before = db.pool_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = [s for result in pool.map(produce, enumerate(sessions)) for s in result]
+    if writer is not None:
+        writer.close(timeout=None)
+    wall = time.perf_counter() - start
+    after = db.pool_stats()
+
+    rows = len(latencies) * 2
+    result = {
+        "rows": rows,
+        "inserts_per_s": round(rows / wall, 1),
+        "turn_latency": summarize(latencies, wall),
+        "pool_borrows": after["borrows"] - before["borrows"],
+    }
+    if writer is not None:
+        result["writer"] = writer.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=25, help="turns (2 rows each) per session")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--modes", default="per-call,bulk,write-behind")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    from src.ai_doctor import db
+
+    db.init_db()
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        sessions = [db.create_session() for _ in range(args.sessions)]
+        results[mode] = _run_mode(mode, sessions, args.turns, args.concurrency, db)
+
+    emit({
+        "benchmark": "db_writes",
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "concurrency": args.concurrency,
+        "pool_size": db.POOL_SIZE,
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""End-to-end benchmark of the patient-facing paths against local stand-ins.
+
+Nothing leaves the machine: a :class:`~scripts.stub_servers.StubServer` answers
+the Groq chat/transcription and OpenAI speech endpoints with configurable
+latency and payload sizes, and the database is either an SQLite stand-in
+(``--db sqlite``, default, see ``scripts/db_standin.py``) or a real MySQL from
+the usual ``DB_*`` settings (``--db mysql``, e.g. the docker container from
+``scripts/bench_db_writes.py``). Scenarios (``--scenarios``):
+
+- ``process_and_log``: the Gradio submit handler, ``--turns`` turns per session;
+  stages ``ttft``, ``first_audio`` and ``total``, plus ``db_flush`` (draining
+  the write-behind queue after the run)
+- ``ui_transcribe_audio``: the Gradio transcription handler on a fresh WAV each call
+- ``transcribe``: POST /transcribe on the FastAPI app (in-process ASGI)
+- ``upload_media``: POST /upload-media with ``--upload-kb`` of image data
+
+Each scenario runs ``--requests`` calls with ``--concurrency`` in flight and
+reports p50/p95/p99 latency and throughput per stage as JSON, so two runs can
+be diffed or compared by a script.
+
+Usage:
+    python -m scripts.bench_e2e --requests 64 --concurrency 16
+    python -m scripts.bench_e2e --scenarios transcribe,upload_media --stt-latency 0.5 --output e2e.json
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from scripts.bench_common import emit, summarize
+from scripts.db_standin import SQLiteStandIn
+from scripts.stub_servers import StubServer
+
+SCENARIOS = "process_and_log,ui_transcribe_audio,transcribe,upload_media"
+SAMPLE_RATE = 16000
+
+
+def synthetic_wav(seconds: float, seed: int) -> bytes:
+    """Mono 16 kHz WAV; ``seed`` makes every clip's bytes unique so STT caches never hit."""
+    frames = int(SAMPLE_RATE * seconds)
+    tone = bytes((seed + i * 7) % 256 for i in range(512))
+    pcm = (tone * (frames * 2 // len(tone) + 1))[: frames * 2]
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(seed.to_bytes(8, "little") + pcm[8:])
+    return buf.getvalue()
+
+
+def _stages(samples: dict[str, list[float]], wall: float) -> dict:
+    return {stage: summarize(values, wall) for stage, values in samples.items()}
+
+
+def _threaded(fn, total: int, concurrency: int) -> tuple[float, int]:
+    """Run ``fn(i)`` for i in range(total) on ``concurrency`` threads; returns (wall, errors)."""
+    errors = 0
+
+    def guarded(i):
+        nonlocal errors
+        try:
+            fn(i)
+        except Exception as e:
+            errors += 1
+            logging.getLogger(__name__).warning(f"call {i} failed: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(guarded, range(total)))
+    return time.perf_counter() - start, errors
+
+
+def bench_process_and_log(args) -> dict:
+    from src.ai_doctor import ui
+
+    samples = {"ttft": [], "first_audio": [], "total": []}
+    turns = max(1, args.turns)
+
+    def session(n):
+        # One conversation: its turns run back to back, like a patient would.
+        session_uuid = None
+        for t in range(min(turns, args.requests - n * turns)):
+            start = time.perf_counter()
+            ttft = first_audio = None
+            question = f"Patient question {n}.{t}: I have a rash on my arm."
+            for text, audio, session_uuid in ui.process_and_log(None, question, session_uuid):
+                now = time.perf_counter() - start
+                if ttft is None and text:
+                    ttft = now
+                if first_audio is None and audio:
+                    first_audio = now
+            samples["total"].append(time.perf_counter() - start)
+            samples["ttft"].append(ttft or 0.0)
+            samples["first_audio"].append(first_audio or 0.0)
+
+    sessions = -(-args.requests // turns)
+    wall, errors = _threaded(session, sessions, args.concurrency)
+    start = time.perf_counter()
+    ui._db_writer.submit(lambda: None).result()
+    flush = time.perf_counter() - start
+    result = _stages(samples, wall)
+    result["db_flush"] = summarize([flush])
+    return {"stages": result, "errors": errors, "sessions": sessions}
+
+
+def bench_ui_transcribe_audio(args, workdir: str) -> dict:
+    from src.ai_doctor import ui
+
+    samples = {"total": []}
+
+    def call(i):
+        path = os.path.join(workdir, f"ui_clip_{i}.wav")
+        with open(path, "wb") as fh:
+            fh.write(synthetic_wav(args.audio_seconds, i))
+        start = time.perf_counter()
+        text, status, _ = ui.ui_transcribe_audio(path, None, vad=False)
+        samples["total"].append(time.perf_counter() - start)
+        if not text:
+            raise RuntimeError(status)
+
+    wall, errors = _threaded(call, args.requests, args.concurrency)
+    return {"stages": _stages(samples, wall), "errors": errors}
+
+
+async def _drive(app, total: int, concurrency: int, request) -> tuple[list[float], float, int]:
+    latencies: list[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with gate:
+                start = time.perf_counter()
+                resp = await request(client, i)
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - start
+    return latencies, wall, errors
+
+
+def bench_transcribe(args) -> dict:
+    from src.ai_doctor import api
+
+    clips = [synthetic_wav(args.audio_seconds, 100_000 + i) for i in range(args.requests)]
+
+    def request(client, i):
+        return client.post("/transcribe", files={"file": (f"clip{i}.wav", clips[i], "audio/wav")})
+
+    latencies, wall, errors = asyncio.run(_drive(api.app, args.requests, args.concurrency, request))
+    return {"stages": {"total": summarize(latencies, wall)}, "errors": errors}
+
+
+def bench_upload_media(args) -> dict:
+    from src.ai_doctor import api
+
+    session_id = f"bench-{uuid.uuid4().hex[:12]}"
+    payload = os.urandom(args.upload_kb * 1024)
+
+    def request(client, i):
+        return client.post(
+            "/upload-media",
+            data={"session_id": session_id},
+            files=[("files", (f"image{i}.png", payload, "image/png"))],
+        )
+
+    try:
+        latencies, wall, errors = asyncio.run(_drive(api.app, args.requests, args.concurrency, request))
+    finally:
+        shutil.rmtree(api.ensure_session_media_dirs(session_id)["base"], ignore_errors=True)
+    return {"stages": {"total": summarize(latencies, wall)}, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=SCENARIOS, help="comma-separated subset of " + SCENARIOS)
+    parser.add_argument("--requests", type=int, default=32, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=4, help="process_and_log turns per session")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stub chat latency before the first token (s)")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="stub delay between streamed words (s)")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="stub transcription latency (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="stub speech latency (s)")
+    parser.add_argument("--speech-kb", type=int, default=24, help="size of each synthesized audio reply")
+    parser.add_argument("--reply-words", type=int, default=40, help="words in the stub doctor reply")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="length of the synthetic WAV clips")
+    parser.add_argument("--upload-kb", type=int, default=512, help="size of each /upload-media file")
+    parser.add_argument("--db", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="per-statement delay for the SQLite stand-in (s)")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    sentence = "Keep the area clean and dry and avoid scratching it."
+    words = (sentence.split(" ") * (args.reply_words // 10 + 1))[: args.reply_words]
+    reply = " ".join(words).rstrip(".") + "."
+    stub = StubServer(
+        reply=reply,
+        token_interval=args.token_interval,
+        speech_bytes=args.speech_kb * 1024,
+        path_latency={
+            "/chat/completions": args.llm_latency,
+            "/audio/transcriptions": args.stt_latency,
+            "/audio/speech": args.tts_latency,
+        },
+    )
+    workdir = tempfile.mkdtemp(prefix="ai_doctor_e2e_")
+    with stub:
+        # Everything the modules read at import time must be set first.
+        os.environ["GROQ_BASE_URL"] = stub.url
+        os.environ["OPENAI_BASE_URL"] = stub.url + "/v1"
+        os.environ.setdefault("GROQ_API_KEY", "bench-key")
+        os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+        os.environ["TTS_OUTPUT_DIR"] = os.path.join(workdir, "tts")
+        os.environ["TTS_CACHE_DIR"] = os.path.join(workdir, "tts_cache")
+
+        standin = SQLiteStandIn(latency=args.db_latency).install() if args.db == "sqlite" else None
+        if standin is None:
+            from src.ai_doctor import db
+
+            db.init_db()
+
+        results = {}
+        try:
+            for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+                if scenario == "process_and_log":
+                    results[scenario] = bench_process_and_log(args)
+                elif scenario == "ui_transcribe_audio":
+                    results[scenario] = bench_ui_transcribe_audio(args, workdir)
+                elif scenario == "transcribe":
+                    results[scenario] = bench_transcribe(args)
+                elif scenario == "upload_media":
+                    results[scenario] = bench_upload_media(args)
+                else:
+                    parser.error(f"unknown scenario {scenario!r}")
+        finally:
+            db_stats = standin.stats() if standin else None
+            if standin:
+                standin.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    emit({
+        "benchmark": "e2e",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "stub": {
+            "llm_latency_s": args.llm_latency,
+            "token_interval_s": args.token_interval,
+            "stt_latency_s": args.stt_latency,
+            "tts_latency_s": args.tts_latency,
+            "speech_kb": args.speech_kb,
+            "reply_words": args.reply_words,
+            "requests": stub.requests,
+            "bytes_received": stub.bytes_received,
+        },
+        "db": {"backend": args.db, "latency_s": args.db_latency if standin else None, "stats": db_stats},
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure cold import time of the package entry points with ``python -X importtime``.
+
+Each module is imported in a fresh interpreter ``--repeats`` times; the
+median cumulative time and the slowest nested imports are reported. The run
+fails (exit code 1) when a module exceeds ``--budget-ms`` or loads one of the
+``--forbid`` modules, so it can gate regressions in CI.
+
+Usage:
+    python -m scripts.bench_import
+    python -m scripts.bench_import --modules src.ai_doctor.api --budget-ms 800
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from scripts.bench_common import emit
+
+DEFAULT_MODULES = "src.ai_doctor,src.ai_doctor.api,src.ai_doctor.stt"
+# Heavy dependencies that only the Gradio UI / speech paths need.
+DEFAULT_FORBID = "gradio,groq,openai,gtts,pydub,speech_recognition,langdetect,numpy,PIL"
+
+
+def importtime(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Import ``module`` in a fresh interpreter; returns (cumulative ms, [(module, self ms)])."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((name, int(self_us) / 1000))
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, entries
+
+
+def loaded_modules(module: str, candidates: list[str]) -> list[str]:
+    """Which of ``candidates`` end up in ``sys.modules`` after importing ``module``."""
+    code = f"import json, sys, {module}; print(json.dumps([m for m in {candidates!r} if m in sys.modules]))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="comma-separated modules to import")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest nested imports to list")
+    parser.add_argument("--budget-ms", type=float, help="fail if any module's median import exceeds this")
+    parser.add_argument("--forbid", default=DEFAULT_FORBID, help="comma-separated modules that must not be loaded ('' to skip)")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    forbid = [m for m in args.forbid.split(",") if m]
+    results, failures = {}, []
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        runs = [importtime(module) for _ in range(max(1, args.repeats))]
+        totals = [total for total, _ in runs]
+        median = statistics.median(totals)
+        slowest = sorted(runs[0][1], key=lambda e: e[1], reverse=True)[: args.top]
+        heavy = loaded_modules(module, forbid) if forbid else []
+        results[module] = {
+            "median_ms": round(median, 1),
+            "min_ms": round(min(totals), 1),
+            "max_ms": round(max(totals), 1),
+            "slowest_self_ms": {name: round(ms, 1) for name, ms in slowest},
+            "forbidden_loaded": heavy,
+        }
+        if args.budget_ms is not None and median > args.budget_ms:
+            failures.append(f"{module}: {median:.0f}ms > budget {args.budget_ms:.0f}ms")
+        if heavy:
+            failures.append(f"{module}: loads {', '.join(heavy)}")
+
+    emit({"benchmark": "import_time", "repeats": args.repeats, "results": results, "failures": failures}, args.output)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark transcript language detection: cold start, warm, memoized and provider paths.
+
+The cold numbers come from fresh interpreters (``--cold-runs`` of them) so
+langdetect's profile loading is included, comparing the old direct
+``langdetect.detect`` call with :func:`ai_doctor.language.detect_language`.
+Warm numbers run in this process over a set of multilingual sample texts:
+
+- ``warm``: first sight of each text (detection runs, result memoized)
+- ``memo``: the same texts again (served from the memo)
+- ``provider``: the STT provider reported the language, nothing is detected
+
+Usage:
+    python -m scripts.bench_langdetect --repeats 200
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from scripts.bench_common import emit, summarize
+
+SAMPLES = [
+    "I have had a dry cough and a mild fever for three days.",
+    "Tengo dolor de cabeza y mareos desde ayer por la tarde.",
+    "J'ai une éruption cutanée qui me démange sur le bras.",
+    "Ich habe seit einer Woche Rückenschmerzen beim Aufstehen.",
+    "Ho mal di gola e il naso chiuso da due giorni.",
+    "Estou com febre alta e dores no corpo desde ontem.",
+    "Mijn knie is gezwollen na het hardlopen.",
+    "У меня болит живот после еды.",
+]
+
+_COLD = {
+    "langdetect": "from langdetect import detect; detect({text!r})",
+    "detect_language": "from src.ai_doctor.language import detect_language; detect_language({text!r})",
+}
+
+
+def _cold_ms(kind: str) -> float:
+    code = (
+        "import time; start = time.perf_counter(); "
+        + _COLD[kind].format(text=SAMPLES[0])
+        + "; print(json.dumps((time.perf_counter() - start)))"
+    )
+    proc = subprocess.run([sys.executable, "-c", "import json; " + code], capture_output=True, text=True, check=True)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def _timed(fn, texts, **kwargs) -> list[float]:
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text, **kwargs)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=200, help="warm/memo/provider calls per mode")
+    parser.add_argument("--cold-runs", type=int, default=3, help="fresh interpreters per cold measurement")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    cold = {kind: summarize([_cold_ms(kind) for _ in range(args.cold_runs)]) for kind in _COLD}
+
+    from src.ai_doctor import language
+
+    language.warm_language_detector()
+    # Unique suffixes so every "warm" call really runs detection.
+    fresh = [f"{SAMPLES[i % len(SAMPLES)]} ({i})" for i in range(args.repeats)]
+    warm = _timed(language.detect_language, fresh)
+    memo = _timed(language.detect_language, fresh)
+    provider = _timed(language.detect_language, fresh, provider_language="english")
+
+    labels = [language.detect_language(text) for text in SAMPLES]
+    emit({
+        "benchmark": "langdetect",
+        "cold_first_call": cold,
+        "warm": summarize(warm),
+        "memo": summarize(memo),
+        "provider": summarize(provider),
+        "sample_labels": labels,
+        "stats": language.language_stats(),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
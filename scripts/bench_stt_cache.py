@@ -0,0 +1,66 @@
+"""Benchmark the transcription cache on repeat clips.
+
+Transcribes each sample clip once (cold, goes to the stub STT server) and then
+``--repeats`` more times (warm, served from the cache) and reports both.
+
+Usage:
+    python -m scripts.bench_stt_cache --latency 0.4 --repeats 20
+    python -m scripts.bench_stt_cache --db /tmp/stt_cache.sqlite   # exercise the SQLite tier
+"""
+import argparse
+import glob
+import logging
+import os
+import time
+
+from scripts.bench_common import emit, summarize
+from scripts.stub_servers import StubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", default="assets/audio/*", help="glob of audio files to transcribe")
+    parser.add_argument("--latency", type=float, default=0.4, help="stub STT latency in seconds")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db", help="SQLite path for the on-disk tier (memory only when omitted)")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    clips = sorted(glob.glob(args.clips))
+    if not clips:
+        raise SystemExit(f"No clips match {args.clips}")
+
+    with StubServer(latency=args.latency) as stub:
+        os.environ["GROQ_BASE_URL"] = stub.url
+        os.environ.setdefault("GROQ_API_KEY", "bench-key")
+
+        from src.ai_doctor import stt
+
+        stt.transcription_cache = stt.TranscriptionCache(db_path=args.db)
+        cold, warm = [], []
+        for clip in clips:
+            start = time.perf_counter()
+            stt.groq_transcribe(file_path=clip)
+            cold.append(time.perf_counter() - start)
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                stt.groq_transcribe(file_path=clip)
+                warm.append(time.perf_counter() - start)
+        upstream_calls = sum(stub.requests.values())
+
+    cold_summary, warm_summary = summarize(cold), summarize(warm)
+    emit({
+        "benchmark": "stt_cache",
+        "clips": len(clips),
+        "stub_latency_s": args.latency,
+        "upstream_calls": upstream_calls,
+        "cold": cold_summary,
+        "warm": warm_summary,
+        "saved_ms_per_repeat": round(cold_summary["mean_ms"] - warm_summary["mean_ms"], 2),
+        "cache": stt.transcription_cache_stats(),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Load benchmark for POST /transcribe against a local stub STT server.
+
+Fires ``--requests`` uploads with ``--concurrency`` in flight and reports
+p50/p99 latency. ``--mode inline`` reproduces the old behaviour (blocking
+SDK call on the event loop) for comparison. Every upload has unique
+content, so the transcription cache is bypassed and each request reaches the stub.
+
+Usage:
+    python -m scripts.bench_transcribe --requests 64 --concurrency 16 --latency 0.3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from scripts.bench_common import emit, summarize
+from scripts.stub_servers import StubServer
+
+
+async def _drive(app, total: int, concurrency: int, payload: bytes) -> tuple[list[float], float, int]:
+    latencies: list[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with gate:
+                # Distinct bytes per request, so the transcription cache never answers.
+                body = i.to_bytes(8, "big") + payload
+                start = time.perf_counter()
+                resp = await client.post("/transcribe", files={"file": (f"clip{i}.wav", body, "audio/wav")})
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - start
+    return latencies, wall, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub STT latency in seconds")
+    parser.add_argument("--payload-kb", type=int, default=256)
+    parser.add_argument("--mode", choices=["async", "inline"], default="async")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with StubServer(latency=args.latency) as stub:
+        os.environ["GROQ_BASE_URL"] = stub.url
+        os.environ.setdefault("GROQ_API_KEY", "bench-key")
+
+        from src.ai_doctor import api, stt
+
+        if args.mode == "inline":
+            async def inline(**kwargs):
+                kwargs.pop("timeout", None)
+                return stt.groq_transcribe(**kwargs)
+
+            api.groq_transcribe_async = inline
+
+        payload = os.urandom(args.payload_kb * 1024)
+        latencies, wall, errors = asyncio.run(_drive(api.app, args.requests, args.concurrency, payload))
+
+    emit({
+        "benchmark": "transcribe",
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "stub_latency_s": args.latency,
+        "errors": errors,
+        "latency": summarize(latencies, wall),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark voice-activity trimming on the sample clips.
+
+For each clip reports how much audio VAD removes, how long detection takes,
+and the FLAC upload size with and without trimming.
+
+Usage:
+    python -m scripts.bench_vad --clips "assets/audio/*"
+"""
+import argparse
+import glob
+import io
+import time
+
+from pydub import AudioSegment
+
+from scripts.bench_common import emit, summarize
+from src.ai_doctor.stt import vad_trim
+
+
+def _flac_bytes(audio: AudioSegment) -> int:
+    buf = io.BytesIO()
+    audio.export(buf, format="flac")
+    return buf.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", default="assets/audio/*", help="glob of audio files")
+    parser.add_argument("--repeats", type=int, default=20, help="timed VAD runs per clip")
+    parser.add_argument("--max-silence-ms", type=int, default=700)
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    clips = sorted(glob.glob(args.clips))
+    if not clips:
+        raise SystemExit(f"No clips match {args.clips}")
+
+    results = []
+    for clip in clips:
+        audio = AudioSegment.from_file(clip).set_frame_rate(16000).set_channels(1)
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            trimmed, report = vad_trim(audio, max_silence_ms=args.max_silence_ms)
+            timings.append(time.perf_counter() - start)
+        before, after = _flac_bytes(audio), _flac_bytes(trimmed)
+        results.append({
+            "clip": clip,
+            **report,
+            "flac_bytes_before": before,
+            "flac_bytes_after": after,
+            "vad_time": summarize(timings),
+            "realtime_factor": round(report["original_ms"] / 1000 / max(summarize(timings)["p50_ms"] / 1000, 1e-9)),
+        })
+
+    emit({"benchmark": "vad", "clips": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark image preprocessing for vision calls.
+
+Compares the raw base64 payload (old ``encode_image``) with the downscaled,
+re-encoded payload (``encode_image_data_url``): request bytes, preprocessing
+time and end-to-end ``analyze_image_with_query`` latency against a stub chat
+endpoint that simulates a constrained uplink.
+
+The bundled sample images are small, so ``--synthetic`` adds a generated
+phone-sized photo (default 4032x3024) to the run.
+
+Usage:
+    python -m scripts.bench_vision_payload --uplink-mbps 20 --repeats 5
+"""
+import argparse
+import glob
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from scripts.bench_common import emit, summarize
+from scripts.stub_servers import StubServer
+
+MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+
+def _synthetic_photo(path: str, size: str):
+    width, height = (int(v) for v in size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 18, (height, width, 3)).astype(np.float32)
+    pixels = np.clip(gradient * np.array([0.9, 0.6, 0.5]) + noise + 40, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, format="JPEG", quality=95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="assets/images/*")
+    parser.add_argument("--synthetic", default="4032x3024", help="WxH of a generated photo, or '' to skip")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub model latency in seconds")
+    parser.add_argument("--uplink-mbps", type=float, default=20.0, help="simulated upload bandwidth")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        images = sorted(glob.glob(args.images))
+        if args.synthetic:
+            synthetic = os.path.join(workdir, f"synthetic_{args.synthetic}.jpg")
+            _synthetic_photo(synthetic, args.synthetic)
+            images.append(synthetic)
+
+        with StubServer(latency=args.latency, upload_bytes_per_s=args.uplink_mbps * 125_000) as stub:
+            os.environ["GROQ_BASE_URL"] = stub.url
+            os.environ.setdefault("GROQ_API_KEY", "bench-key")
+            # Every call repeats the same prompt; without this the reply cache answers them.
+            os.environ["VISION_CACHE_SIZE"] = "0"
+            from src.ai_doctor import vision
+
+            results = []
+            for image in images:
+                row = {"image": os.path.basename(image)}
+                for label, encode in (("raw", vision.encode_image), ("prepared", vision.encode_image_data_url)):
+                    prep, e2e = [], []
+                    for _ in range(args.repeats):
+                        start = time.perf_counter()
+                        payload = encode(image)
+                        encoded_at = time.perf_counter()
+                        vision.analyze_image_with_query("Describe findings", MODEL, payload)
+                        prep.append(encoded_at - start)
+                        e2e.append(time.perf_counter() - start)
+                    row[label] = {"payload_chars": len(payload), "preprocess": summarize(prep), "end_to_end": summarize(e2e)}
+                row["payload_reduction"] = round(1 - row["prepared"]["payload_chars"] / row["raw"]["payload_chars"], 3)
+                results.append(row)
+
+    emit({
+        "benchmark": "vision_payload",
+        "uplink_mbps": args.uplink_mbps,
+        "stub_latency_s": args.latency,
+        "images": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
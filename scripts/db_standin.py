@@ -0,0 +1,137 @@
+"""SQLite stand-in for the MySQL database, for benchmarks that should not need a server.
+
+``SQLiteStandIn(latency=0.002).install()`` points :mod:`ai_doctor.db` at an
+SQLite database: ``_cursor`` hands out cursors that translate the MySQL
+dialect used by ``db.py`` (``%s`` placeholders, ``INSERT IGNORE``), and the
+schema is created up front so ``ensure_schema`` is a no-op. ``latency`` adds a
+per-statement sleep to mimic the network round trip to a real server.
+``uninstall()`` restores the MySQL code paths.
+
+For numbers against real MySQL, run a container instead and skip the stand-in:
+
+    docker run -d --name ai-doctor-mysql -p 3306:3306 -e MYSQL_ROOT_PASSWORD=bench mysql:8
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_uuid CHAR(36) NOT NULL UNIQUE,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_uuid CHAR(36) NOT NULL REFERENCES sessions(session_uuid) ON DELETE CASCADE,
+        role TEXT NOT NULL CHECK (role IN ('patient', 'doctor')),
+        content TEXT NOT NULL,
+        image_path VARCHAR(255),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_session_id ON messages (session_uuid, id)",
+)
+
+
+def _translate(sql: str) -> str:
+    return sql.replace("%s", "?").replace("INSERT IGNORE", "INSERT OR IGNORE")
+
+
+class _Cursor:
+    def __init__(self, standin: "SQLiteStandIn"):
+        self._standin = standin
+        self._cur = standin._conn.cursor()
+
+    def _timed(self, fn, sql, params):
+        if self._standin.latency:
+            time.sleep(self._standin.latency)
+        start = time.perf_counter()
+        fn(_translate(sql), params)
+        self._standin._record(time.perf_counter() - start)
+
+    def execute(self, sql, params=()):
+        self._timed(self._cur.execute, sql, params)
+
+    def executemany(self, sql, rows):
+        self._timed(self._cur.executemany, sql, list(rows))
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteStandIn:
+    """One shared SQLite connection (serialized by a lock) behind ``db._cursor``."""
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        self.path = path
+        self.latency = latency
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._stats = {"statements": 0, "transactions": 0, "exec_s": 0.0}
+        self._saved: dict | None = None
+
+    def _record(self, seconds: float):
+        self._stats["statements"] += 1
+        self._stats["exec_s"] += seconds
+
+    @contextmanager
+    def cursor(self, commit: bool = False):
+        with self._lock:
+            cur = _Cursor(self)
+            try:
+                yield cur
+                if commit:
+                    self._conn.commit()
+                    self._stats["transactions"] += 1
+            except BaseException:
+                self._conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def install(self, db=None) -> "SQLiteStandIn":
+        if db is None:
+            from src.ai_doctor import db
+        self._db = db
+        self._saved = {"_cursor": db._cursor, "_schema_ready": db._schema_ready}
+        db._cursor = self.cursor
+        db._schema_ready = True
+        return self
+
+    def uninstall(self):
+        if self._saved is not None:
+            for name, value in self._saved.items():
+                setattr(self._db, name, value)
+            self._saved = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["exec_s"] = round(stats["exec_s"], 4)
+            stats["messages"] = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            stats["sessions"] = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+    def close(self):
+        self.uninstall()
+        self._conn.close()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,196 @@
+"""Local HTTP stand-ins for the provider endpoints used by the benchmarks.
+
+Start one with ``StubServer(latency=0.2).start()`` and point the SDKs at it via
+``GROQ_BASE_URL`` (and ``OPENAI_BASE_URL=<url>/v1`` for speech). Every request
+sleeps ``latency`` seconds before answering so the benchmarks see realistic
+network wait without touching a real provider; ``path_latency`` overrides it
+per endpoint (e.g. ``{"/audio/speech": 0.4}``) and ``upload_bytes_per_s`` adds
+a delay proportional to the request size to mimic a constrained uplink.
+``speech_bytes`` sets the size of the synthesized audio returned by
+``/audio/speech``. Pass ``tls_cert``/``tls_key`` to serve HTTPS.
+"""
+import json
+import os
+import ssl
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, events):
+        """Send server-sent events with chunked transfer encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            data = f"data: {event}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        stub.record(self.path, len(body))
+        delay = stub.latency_for(self.path) + (len(body) / stub.upload_bytes_per_s if stub.upload_bytes_per_s else 0.0)
+        if delay:
+            time.sleep(delay)
+        if self.path.endswith("/audio/transcriptions"):
+            self._send_json(stub.transcription_payload(body))
+        elif self.path.endswith("/chat/completions"):
+            request = json.loads(body or b"{}")
+            if request.get("stream"):
+                self._send_stream(stub.chat_stream_events(request))
+            else:
+                self._send_json(stub.chat_payload(request))
+        elif self.path.endswith("/audio/speech"):
+            self._send_bytes(stub.speech_payload(), "audio/mpeg")
+        else:
+            self._send_json({"error": {"message": f"no stub for {self.path}"}}, status=404)
+
+
+class StubServer:
+    """Threaded HTTP server answering like the Groq transcription/chat and OpenAI speech endpoints."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        transcript: str = "I have had a dry cough and a mild fever for three days.",
+        reply: str = "With what I see, I think you have mild contact dermatitis. Keep the area clean and dry.",
+        upload_bytes_per_s: float = 0.0,
+        token_interval: float = 0.0,
+        tls_cert: str | None = None,
+        tls_key: str | None = None,
+        path_latency: dict[str, float] | None = None,
+        speech_bytes: int = 24_000,
+    ):
+        self.latency = latency
+        self.path_latency = dict(path_latency or {})
+        self.speech_bytes = speech_bytes
+        self.transcript = transcript
+        self.reply = reply
+        self.upload_bytes_per_s = upload_bytes_per_s
+        self.token_interval = token_interval
+        self.requests: dict[str, int] = {}
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread: threading.Thread | None = None
+        self.scheme = "http"
+        if tls_cert:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(tls_cert, tls_key)
+            self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True)
+            self.scheme = "https"
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def latency_for(self, path: str) -> float:
+        for suffix, latency in self.path_latency.items():
+            if path.endswith(suffix):
+                return latency
+        return self.latency
+
+    def record(self, path: str, size: int):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.bytes_received += size
+
+    def transcription_payload(self, body: bytes) -> dict:
+        payload = {"text": self.transcript}
+        if b"verbose_json" in body:
+            payload.update(language="english", duration=5.0, segments=[
+                {"id": 0, "start": 0.0, "end": 5.0, "text": self.transcript,
+                 "avg_logprob": -0.2, "no_speech_prob": 0.01, "compression_ratio": 1.2},
+            ])
+        return payload
+
+    def chat_payload(self, request: dict) -> dict:
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def speech_payload(self) -> bytes:
+        """``speech_bytes`` of MPEG-frame-shaped filler (not playable audio)."""
+        frame = b"\xff\xfb\x90\x64" + b"\x00" * 413
+        return (frame * (self.speech_bytes // len(frame) + 1))[: self.speech_bytes]
+
+    def chat_stream_events(self, request: dict):
+        """Yield SSE payloads for a streamed reply, one word per chunk, ``token_interval`` apart."""
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            if i and self.token_interval:
+                time.sleep(self.token_interval)
+            yield json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            })
+        yield "[DONE]"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def self_signed_cert(directory: str, host: str = "127.0.0.1") -> tuple[str, str]:
+    """Create a throwaway self-signed certificate for ``host`` with the openssl CLI."""
+    cert, key = os.path.join(directory, "stub.crt"), os.path.join(directory, "stub.key")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", f"/CN={host}", "-addext", f"subjectAltName=IP:{host}",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
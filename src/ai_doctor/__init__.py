@@ -1,13 +1,46 @@
-from .prompts import SYSTEM_PROMPT
-from .vision import encode_image, analyze_image_with_query
-from .tts import text_to_speech_with_openai, text_to_speech_with_gtts
-from .ui import create_app
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public names resolve lazily (PEP 562): `import src.ai_doctor.api` no longer
+# pulls in gradio, the provider SDKs or gTTS just because the package is imported.
+_EXPORTS = {
+    "SYSTEM_PROMPT": ".prompts",
+    "encode_image": ".vision",
+    "encode_image_data_url": ".vision",
+    "analyze_image_with_query": ".vision",
+    "stream_image_with_query": ".vision",
+    "text_to_speech_with_openai": ".tts",
+    "text_to_speech_with_gtts": ".tts",
+    "create_app": ".ui",
+}
+
+if TYPE_CHECKING:
+    from .prompts import SYSTEM_PROMPT
+    from .vision import encode_image, encode_image_data_url, analyze_image_with_query, stream_image_with_query
+    from .tts import text_to_speech_with_openai, text_to_speech_with_gtts
+    from .ui import create_app
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     "SYSTEM_PROMPT",
     "encode_image",
+    "encode_image_data_url",
     "analyze_image_with_query",
+    "stream_image_with_query",
     "text_to_speech_with_openai",
     "text_to_speech_with_gtts",
     "create_app",
-]
\ No newline at end of file
+]
@@ -1,10 +1,150 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
+import asyncio
+import hashlib
+import json
 import os
-from .stt import groq_transcribe
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from . import db_async, metrics
+from .profiling import HEADER as PROFILE_HEADER, profiler
+from .language import warm_language_detector
+from .stt import groq_transcribe_async
+from .tempmedia import temp_media
 
-app = FastAPI(title="AI Doctor STT API")
+# Upper bound on in-flight transcriptions per worker and on how long one request may take.
+STT_CONCURRENCY = int(os.environ.get("STT_CONCURRENCY", 8))
+STT_TIMEOUT = float(os.environ.get("STT_TIMEOUT", 60))
+
+_stt_slots = asyncio.Semaphore(STT_CONCURRENCY)
+
+# Batch transcription: items per request, and how many of a batch's items may be
+# in flight at once (each still takes one of the STT_CONCURRENCY slots).
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 100))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+
+# Uploads are copied in fixed-size chunks so memory stays flat regardless of file size.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_TMP_DIR = os.path.join(tempfile.gettempdir(), "ai_doctor_uploads")
+
+# Uploads are removed as soon as their request finishes; anything older than this
+# was left by a crashed request or a previous process and is swept by the janitor.
+UPLOAD_ORPHAN_TTL = float(os.environ.get("UPLOAD_ORPHAN_TTL", 3600))
+temp_media.register_dir(UPLOAD_TMP_DIR, max_age=UPLOAD_ORPHAN_TTL)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    temp_media.start()
+    # Load langdetect's profiles in the background so the first transcript doesn't pay for it.
+    asyncio.get_running_loop().run_in_executor(None, warm_language_detector)
+    try:
+        yield
+    finally:
+        temp_media.stop()
+        db_async.close()
+
+
+app = FastAPI(title="AI Doctor STT API", lifespan=_lifespan)
+
+
+@app.middleware("http")
+async def _record_request(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so session ids don't explode cardinality.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route, status=status)
+
+
+@app.middleware("http")
+async def _profile_request(request: Request, call_next):
+    """Profile a PROFILE_SAMPLE_RATE fraction of requests; the id comes back in X-Profile-Id.
+
+    Always stack-sampled: cProfile on the event-loop thread would also record
+    every other request's coroutines running while this one awaits.
+    """
+    session = profiler.start(f"{request.method} {request.url.path}", mode="sample")
+    if session is None:
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        session.stop(status=500)
+        await run_in_threadpool(session.save)
+        raise
+    response.headers[PROFILE_HEADER] = session.id
+    body = response.body_iterator
+
+    async def finish_after_body():
+        # Streamed responses keep working after call_next returns; stop when the body is sent.
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            session.stop(status=response.status_code)
+            await run_in_threadpool(session.save)
+
+    response.body_iterator = finish_after_body()
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def _limited_transcribe(**kwargs) -> tuple[str, str]:
+    async with _stt_slots:
+        return await groq_transcribe_async(**kwargs)
+
+
+async def _stream_to_file(upload: UploadFile, dest_path: str, max_bytes: Optional[int] = None) -> tuple[int, str]:
+    """Copy ``upload`` to ``dest_path`` chunk by chunk and return (size, sha256 hex).
+
+    Raises 413 as soon as ``max_bytes`` (default ``MAX_UPLOAD_BYTES``) is
+    exceeded; the partial file is removed.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+    return size, digest.hexdigest()
+
+
+def _unique_temp_path(directory: str, prefix: str, filename: str | None) -> str:
+    os.makedirs(directory, exist_ok=True)
+    _, ext = os.path.splitext(os.path.basename(filename or ""))
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=ext.lower(), dir=directory)
+    os.close(fd)
+    return path
 
 
 @app.post("/transcribe")
@@ -13,6 +153,7 @@ async def transcribe(
     url: Optional[str] = Form(None),
     model: str = Form("whisper-large-v3-turbo"),
     response_format: str = Form("json"),
+    timeout: Optional[float] = Form(None),
 ):
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
@@ -22,22 +163,157 @@ async def transcribe(
         raise HTTPException(status_code=400, detail="Provide either file upload or url.")
 
     file_path = None
+    content_hash = None
     if file:
-        contents = await file.read()
-        tmp_path = f"temp_upload_{file.filename}"
-        with open(tmp_path, "wb") as fh:
-            fh.write(contents)
-        file_path = tmp_path
+        # Unique per request so concurrent uploads of the same filename never collide.
+        file_path = _unique_temp_path(UPLOAD_TMP_DIR, "temp_upload_", file.filename)
+        _, content_hash = await _stream_to_file(file, file_path)
 
+    # Waiting for a free slot counts against the request's timeout.
+    budget = min(timeout, STT_TIMEOUT) if timeout and timeout > 0 else STT_TIMEOUT
     try:
-        text, lang = groq_transcribe(file_path=file_path, url=url, model=model, api_key=api_key, response_format=response_format)
+        text, lang = await asyncio.wait_for(
+            _limited_transcribe(
+                file_path=file_path,
+                url=url,
+                model=model,
+                api_key=api_key,
+                response_format=response_format,
+                content_hash=content_hash,
+            ),
+            timeout=budget,
+        )
         return JSONResponse({"text": text, "language": lang})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Transcription timed out after {budget:g}s")
     finally:
-        if file and file_path and os.path.exists(file_path):
+        if file and file_path:
+            temp_media.discard(file_path)
+
+
+def _batch_line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _item_error(e: BaseException, budget: float) -> tuple[int, str]:
+    if isinstance(e, HTTPException):
+        return e.status_code, str(e.detail)
+    if isinstance(e, asyncio.TimeoutError):
+        return 504, f"Transcription timed out after {budget:g}s"
+    if isinstance(e, ValueError):
+        return 400, str(e)
+    return 502, f"Transcription failed: {e}"
+
+
+@app.post("/transcribe/batch")
+async def transcribe_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    urls: Optional[List[str]] = Form(None),
+    model: str = Form("whisper-large-v3-turbo"),
+    response_format: str = Form("json"),
+    language: Optional[str] = Form(None),
+    prompt: Optional[str] = Form(None),
+    temperature: float = Form(0.0),
+    timeout: Optional[float] = Form(None),
+    concurrency: Optional[int] = Form(None),
+):
+    """Transcribe many files and/or URLs; results stream back as NDJSON in completion order.
+
+    One line per item: ``{"index", "source", "ok": true, "text", "language", "elapsed_ms"}``
+    or ``{"index", "source", "ok": false, "status", "error", "elapsed_ms"}``. A failing item
+    never fails the batch. The last line is ``{"done": true, "total", "succeeded", "failed", "elapsed_ms"}``.
+    ``index`` counts files first, then URLs, in the order they were sent; ``timeout`` applies per item.
+    """
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="GROQ_API_KEY not set in environment")
+    files = [f for f in files or [] if f.filename]
+    urls = [u.strip() for u in urls or [] if u and u.strip()]
+    total = len(files) + len(urls)
+    if not total:
+        raise HTTPException(status_code=400, detail="Provide at least one file or url.")
+    if total > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+
+    # Uploads are copied out before the response starts streaming; an oversized
+    # file becomes that item's error instead of failing the batch.
+    items: list[dict] = []
+    try:
+        for f in files:
+            item = {"index": len(items), "source": f.filename}
+            path = _unique_temp_path(UPLOAD_TMP_DIR, "batch_upload_", f.filename)
             try:
-                os.remove(file_path)
-            except Exception:
-                pass
+                _, item["content_hash"] = await _stream_to_file(f, path)
+                item["file_path"] = path
+            except HTTPException as e:
+                item["error"] = e
+            items.append(item)
+    except BaseException:
+        for item in items:
+            if item.get("file_path"):
+                temp_media.discard(item["file_path"])
+        raise
+    items.extend({"index": len(files) + i, "source": url, "url": url} for i, url in enumerate(urls))
+
+    budget = min(timeout, STT_TIMEOUT) if timeout and timeout > 0 else STT_TIMEOUT
+    slots = asyncio.Semaphore(max(1, min(concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)))
+    options = {"model": model, "response_format": response_format, "language": language, "prompt": prompt, "temperature": temperature}
+
+    async def run(item: dict) -> dict:
+        start = time.perf_counter()
+        result = {"index": item["index"], "source": item["source"]}
+        try:
+            if "error" in item:
+                raise item["error"]
+            async with slots:
+                # Like /transcribe, waiting for an STT slot counts against the item's timeout.
+                text, lang = await asyncio.wait_for(
+                    _limited_transcribe(
+                        file_path=item.get("file_path"),
+                        url=item.get("url"),
+                        api_key=api_key,
+                        content_hash=item.get("content_hash"),
+                        **options,
+                    ),
+                    timeout=budget,
+                )
+            result.update(ok=True, text=text, language=lang)
+        except Exception as e:
+            status, detail = _item_error(e, budget)
+            result.update(ok=False, status=status, error=detail)
+        finally:
+            if item.get("file_path"):
+                temp_media.discard(item["file_path"])
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def results():
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                succeeded += result["ok"]
+                yield _batch_line(result)
+            yield _batch_line({
+                "done": True,
+                "total": total,
+                "succeeded": succeeded,
+                "failed": total - succeeded,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+        finally:
+            # Client went away: stop the remaining items. Tasks cancelled before they
+            # started never reach run()'s cleanup, so their uploads are removed here.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for item in items:
+                if item.get("file_path"):
+                    temp_media.discard(item["file_path"])
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 
 def ensure_session_media_dirs(session_id: str) -> dict:
@@ -73,6 +349,11 @@ async def upload_media(
         raise HTTPException(status_code=400, detail="session_id cannot be empty")
     if not files:
         raise HTTPException(status_code=400, detail="At least one file must be provided")
+    # The multipart parser already spooled every part, so an oversized file is
+    # rejected before anything is written; _stream_to_file still enforces the cap.
+    for f in files:
+        if f.size is not None and f.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"{os.path.basename(f.filename or '')} exceeds {MAX_UPLOAD_BYTES} bytes")
 
     dirs = ensure_session_media_dirs(session_id)
     stored = []
@@ -87,11 +368,86 @@ async def upload_media(
         safe_name = os.path.basename(f.filename)
         target_path = os.path.join(target_dir, safe_name)
         try:
-            contents = await f.read()
-            with open(target_path, "wb") as out:
-                out.write(contents)
-            stored.append({"filename": safe_name, "stored": True, "kind": kind, "path": target_path})
+            # Stream into a sibling temp file and rename, so readers never see a partial upload.
+            part_path = _unique_temp_path(target_dir, ".upload_", safe_name)
+            size, sha256 = await _stream_to_file(f, part_path)
+            os.replace(part_path, target_path)
+            metrics.payload("upload_media", size)
+            stored.append({
+                "filename": safe_name,
+                "stored": True,
+                "kind": kind,
+                "path": target_path,
+                "bytes": size,
+                "sha256": sha256,
+            })
+        except HTTPException:
+            raise
         except Exception as e:
             stored.append({"filename": safe_name, "stored": False, "error": str(e)})
 
     return JSONResponse({"session_id": session_id, "directories": dirs, "files": stored})
+
+
+# Session history. DB calls go through db_async, so a slow MySQL never blocks the event loop.
+HISTORY_MAX_LIMIT = int(os.environ.get("HISTORY_MAX_LIMIT", 500))
+
+
+class MessageIn(BaseModel):
+    role: str
+    content: str
+    image_path: Optional[str] = None
+
+
+def _message_json(row) -> dict:
+    message_id, role, content, image_path, created_at = row
+    return {
+        "id": message_id,
+        "role": role,
+        "content": content,
+        "image_path": image_path,
+        "created_at": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+    }
+
+
+async def _db_call(fn, *args, **kwargs):
+    """Await a db_async call, mapping bad input to 400 and database failures to 503."""
+    try:
+        await db_async.ensure_schema()
+        return await fn(*args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _check_limit(limit: int) -> int:
+    if limit < 1 or limit > HISTORY_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {HISTORY_MAX_LIMIT}")
+    return limit
+
+
+@app.post("/sessions", status_code=201)
+async def create_session_endpoint():
+    session_id = await _db_call(db_async.create_session)
+    return {"session_id": session_id}
+
+
+@app.get("/sessions/{session_id}/messages")
+async def list_session_messages(session_id: str, after_id: int = 0, limit: int = 100):
+    """One keyset page of a session's history; pass ``next_after_id`` back as ``after_id``."""
+    rows, next_after_id = await _db_call(db_async.fetch_messages_page, session_id, after_id, _check_limit(limit))
+    return {"session_id": session_id, "messages": [_message_json(r) for r in rows], "next_after_id": next_after_id}
+
+
+@app.get("/sessions/{session_id}/messages/recent")
+async def recent_session_messages(session_id: str, limit: int = 20):
+    rows = await _db_call(db_async.fetch_recent_messages, session_id, _check_limit(limit))
+    return {"session_id": session_id, "messages": [_message_json(r) for r in rows]}
+
+
+@app.post("/sessions/{session_id}/messages", status_code=201)
+async def add_session_message(session_id: str, message: MessageIn):
+    # Bulk path so the session row is created on first write, like the UI does.
+    await _db_call(db_async.save_messages_bulk, [(session_id, message.role, message.content, message.image_path)])
+    return {"session_id": session_id, "stored": True}
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with optional TTL and byte budget.
+
+    ``max_entries`` bounds the number of items, ``max_bytes`` (with ``sizeof``)
+    bounds their total size, and ``ttl`` seconds expires stale items lazily on read.
+    ``on_evict(key, value)`` is called outside the lock for every item dropped
+    by eviction or expiry, e.g. to delete a backing file.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple[float | None, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _dropped(self, items: list):
+        if self._on_evict is not None:
+            for key, value in items:
+                self._on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            expires_at, size, value = item
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+            del self._data[key]
+            self._bytes -= size
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+        self._dropped([(key, value)])
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                evicted_key, (_, evicted_size, evicted_value) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+                evicted.append((evicted_key, evicted_value))
+        self._dropped(evicted)
+
+    def expire(self) -> int:
+        """Drop every expired item now instead of waiting for a read; returns how many."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, (expires_at, size, value) in list(self._data.items()):
+                if expires_at is not None and expires_at <= now:
+                    del self._data[key]
+                    self._bytes -= size
+                    self._stats["expirations"] += 1
+                    expired.append((key, value))
+        self._dropped(expired)
+        return len(expired)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._bytes -= item[1]
+            return item[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._data), bytes=self._bytes)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight block and receive the leader's result or exception.
+    Nothing is remembered once the call completes, pair it with a cache for that.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Hashable) -> tuple[_Call, bool]:
+        """Register interest in ``key``; returns ``(call, is_leader)``."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def finish(self, key: Hashable, call: _Call, value: Any = None, error: Optional[BaseException] = None):
+        """Leader only: publish the outcome to the waiters and forget ``key``."""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.value, call.error = value, error
+        call.done.set()
+
+    @staticmethod
+    def wait(call: _Call, timeout: Optional[float] = None) -> Any:
+        """Follower: block until the leader finishes and return its value (or raise its error)."""
+        if not call.done.wait(timeout):
+            raise TimeoutError("coalesced call did not finish in time")
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Run ``fn`` once per in-flight ``key``; returns ``(value, shared)``."""
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, value=value)
+        return value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+__all__ = ["LRUCache", "SingleFlight"]
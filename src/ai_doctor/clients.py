@@ -0,0 +1,93 @@
+import os
+import ssl
+import threading
+from typing import TYPE_CHECKING
+
+# httpx and the SDKs are imported when the first client is built; importing them
+# costs several hundred milliseconds that processes which never call a provider skip.
+if TYPE_CHECKING:
+    import httpx
+    from groq import Groq
+
+# Connection pool / timeout settings shared by every provider client.
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 60))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_CA_BUNDLE = os.environ.get("HTTP_CA_BUNDLE") or None
+
+_clients: dict[tuple[str, str], object] = {}
+_lock = threading.Lock()
+
+
+def _http_client() -> "httpx.Client":
+    import httpx
+
+    verify = ssl.create_default_context(cafile=HTTP_CA_BUNDLE) if HTTP_CA_BUNDLE else True
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        verify=verify,
+    )
+
+
+def _build(provider: str, api_key: str):
+    import httpx
+
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    if provider == "groq":
+        from groq import Groq
+
+        return Groq(api_key=api_key, timeout=timeout, http_client=_http_client())
+    if provider == "openai":
+        try:
+            from openai import OpenAI
+        except ImportError:
+            raise RuntimeError("openai package is not installed")
+        return OpenAI(api_key=api_key, timeout=timeout, http_client=_http_client())
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def get_client(provider: str, api_key: str):
+    """Return the shared SDK client for ``(provider, api_key)``, building it on first use.
+
+    Each client owns one keep-alive httpx pool, so repeated calls reuse open
+    TCP/TLS connections instead of handshaking every time.
+    """
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _build(provider, api_key)
+                _clients[key] = client
+    return client
+
+
+def groq_client(api_key: str) -> "Groq":
+    return get_client("groq", api_key)
+
+
+def openai_client(api_key: str):
+    return get_client("openai", api_key)
+
+
+def close_clients():
+    """Close every cached client and its connection pool (rebuilt on next use)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+__all__ = ["get_client", "groq_client", "openai_client", "close_clients"]
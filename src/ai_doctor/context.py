@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+
+from . import metrics
+from .cache import LRUCache
+from .db import fetch_recent_messages
+from .prompts import SYSTEM_PROMPT
+
+# Prompt budget for the system prompt, earlier turns and the new question, in
+# approximate tokens. Turns that do not fit are folded into a short summary of
+# at most CONTEXT_SUMMARY_TOKENS; anything beyond that is dropped.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 3000))
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", 200))
+CONTEXT_HISTORY_MESSAGES = int(os.environ.get("CONTEXT_HISTORY_MESSAGES", 40))
+CONTEXT_CACHE_SESSIONS = int(os.environ.get("CONTEXT_CACHE_SESSIONS", 1024))
+
+# Per-message framing the chat template adds around the content.
+_MESSAGE_OVERHEAD_TOKENS = 4
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(?:\s|$)", re.S)
+_ROLE = {"patient": "user", "doctor": "assistant"}
+
+logger = logging.getLogger(__name__)
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text), never below the word count."""
+    if not text:
+        return 0
+    return max(len(text.split()), (len(text) + 3) // 4)
+
+
+def message_tokens(message: dict) -> int:
+    content = message["content"]
+    if isinstance(content, list):
+        text = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    else:
+        text = content
+    return approx_tokens(text) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def system_message(prompt: str = SYSTEM_PROMPT) -> dict:
+    return {"role": "system", "content": prompt}
+
+
+def _history_message(row) -> dict:
+    _, role, content, image_path, _ = row
+    if role == "patient" and image_path:
+        content = f"{content}\n[The patient attached an image.]"
+    return {"role": _ROLE[role], "content": content}
+
+
+def _gist(text: str, max_chars: int = 160) -> str:
+    match = _FIRST_SENTENCE.match(text.strip())
+    gist = (match.group(1) if match else text.strip()).replace("\n", " ")
+    return gist if len(gist) <= max_chars else gist[: max_chars - 3].rstrip() + "..."
+
+
+def summarize_turns(rows, max_tokens: int = CONTEXT_SUMMARY_TOKENS) -> str | None:
+    """Extractive summary of evicted turns: the gist of what the patient said, newest kept first.
+
+    No model call is made; the first sentence of each older patient message is
+    kept until ``max_tokens`` is reached.
+    """
+    header = "Earlier in this conversation the patient mentioned: "
+    budget = max_tokens - approx_tokens(header)
+    gists: list[str] = []
+    for row in reversed(rows):
+        if row[1] != "patient" or not row[2].strip():
+            continue
+        gist = _gist(row[2])
+        cost = approx_tokens(gist) + 1
+        if cost > budget:
+            break
+        gists.append(gist)
+        budget -= cost
+    if not gists:
+        return None
+    return header + " | ".join(reversed(gists))
+
+
+def fit_history(rows, budget: int, summary_tokens: int = CONTEXT_SUMMARY_TOKENS) -> list[dict]:
+    """Keep the newest turns that fit ``budget`` tokens; summarize (then drop) the rest.
+
+    Returns chat messages, oldest first, optionally preceded by a system
+    message carrying the summary of evicted turns.
+    """
+    kept: list[dict] = []
+    used = 0
+    cut = 0
+    reserve = min(summary_tokens, budget // 4)
+    for i in range(len(rows) - 1, -1, -1):
+        message = _history_message(rows[i])
+        cost = message_tokens(message)
+        limit = budget - (reserve if i > 0 else 0)
+        if used + cost > limit:
+            cut = i + 1
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    # A history that starts with the doctor's reply has lost its question; drop it.
+    while kept and kept[0]["role"] == "assistant":
+        kept.pop(0)
+        cut += 1
+    if cut and reserve:
+        summary = summarize_turns(rows[:cut], max_tokens=reserve)
+        if summary:
+            kept.insert(0, system_message(summary))
+    return kept
+
+
+_context_cache = LRUCache(max_entries=CONTEXT_CACHE_SESSIONS)
+
+
+def history_messages(session_uuid: str | None, budget: int) -> list[dict]:
+    """Earlier turns of ``session_uuid`` fitted into ``budget`` tokens (cached per session).
+
+    The cache key includes the newest message id, so a saved turn produces a
+    fresh window on the next call. Database errors yield an empty history.
+    """
+    if not session_uuid or budget <= 0:
+        return []
+    try:
+        rows = fetch_recent_messages(session_uuid, limit=CONTEXT_HISTORY_MESSAGES)
+    except Exception as e:
+        logger.warning(f"Conversation history unavailable for {session_uuid}: {e}")
+        return []
+    if not rows:
+        return []
+    key = (session_uuid, rows[-1][0], budget)
+    history = _context_cache.get(key)
+    if history is None:
+        history = fit_history(rows, budget)
+        _context_cache.set(key, history)
+    return history
+
+
+def build_context(
+    session_uuid: str | None,
+    patient_text: str = "",
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    system_prompt: str = SYSTEM_PROMPT,
+) -> list[dict]:
+    """Messages to send before the new user turn: system prompt, then budgeted history.
+
+    ``patient_text`` is only used to reserve its share of ``budget``; the
+    caller appends the new user message (text and/or image) itself.
+    """
+    system = system_message(system_prompt)
+    remaining = budget - message_tokens(system) - approx_tokens(patient_text) - _MESSAGE_OVERHEAD_TOKENS
+    # Round down so questions of similar length share a cached history window.
+    remaining -= remaining % 64
+    return [system] + history_messages(session_uuid, remaining)
+
+
+def context_cache_stats() -> dict:
+    return _context_cache.stats()
+
+
+metrics.register_stats("context_cache", context_cache_stats, cache=True)
+
+
+__all__ = [
+    "approx_tokens",
+    "build_context",
+    "context_cache_stats",
+    "fit_history",
+    "history_messages",
+    "summarize_turns",
+    "system_message",
+]
@@ -1,10 +1,54 @@
+import atexit
+import itertools
+import logging
 import os
+import queue
+import threading
+import time
 import uuid
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 from datetime import datetime
 
+from . import metrics
+from .cache import LRUCache
+
 DB_NAME = "Optiwell"
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+POOL_RECONNECT_ATTEMPTS = int(os.environ.get("DB_POOL_RECONNECT_ATTEMPTS", 3))
+
+# Write-behind message logging: rows are queued and inserted in batches of up to
+# DB_WRITE_BATCH, at least every DB_WRITE_INTERVAL seconds. When DB_WRITE_QUEUE
+# rows are pending, producers block up to DB_WRITE_BLOCK_TIMEOUT seconds.
+DB_WRITE_BEHIND = os.environ.get("DB_WRITE_BEHIND", "0").lower() in {"1", "true", "yes"}
+DB_WRITE_BATCH = int(os.environ.get("DB_WRITE_BATCH", 200))
+DB_WRITE_INTERVAL = float(os.environ.get("DB_WRITE_INTERVAL", 0.5))
+DB_WRITE_QUEUE = int(os.environ.get("DB_WRITE_QUEUE", 10000))
+DB_WRITE_BLOCK_TIMEOUT = float(os.environ.get("DB_WRITE_BLOCK_TIMEOUT", 5))
+
+# History reads: default page size for keyset pagination, and an in-process cache
+# of each session's most recent DB_RECENT_MESSAGES rows (dropped on every write).
+DB_PAGE_SIZE = int(os.environ.get("DB_PAGE_SIZE", 100))
+DB_RECENT_MESSAGES = int(os.environ.get("DB_RECENT_MESSAGES", 50))
+DB_RECENT_CACHE_SESSIONS = int(os.environ.get("DB_RECENT_CACHE_SESSIONS", 1024))
+DB_RECENT_CACHE_TTL = float(os.environ.get("DB_RECENT_CACHE_TTL", 300))
+
+_ROLES = {"patient", "doctor"}
+_MESSAGE_COLUMNS = "id, role, content, image_path, created_at"
+_INSERT_SESSION = "INSERT IGNORE INTO sessions (session_uuid, created_at) VALUES (%s, %s)"
+_INSERT_MESSAGE = "INSERT INTO messages (session_uuid, role, content, image_path, created_at) VALUES (%s, %s, %s, %s, %s)"
+
+logger = logging.getLogger(__name__)
+
+# Sessions known to exist in the database, so bulk writes skip re-inserting them.
+_known_sessions = LRUCache(max_entries=DB_RECENT_CACHE_SESSIONS * 4)
+
+_schema_ready = False
+_schema_lock = threading.Lock()
 
 def _base_config():
     return {
@@ -16,11 +60,198 @@ def _base_config():
         "collation": "utf8mb4_unicode_ci",
     }
 
+
+class PooledConnection:
+    """Proxy around a pooled connection; ``close()`` hands it back to the pool."""
+
+    __slots__ = ("_pool", "_conn")
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise PoolError("Connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with health-check-on-borrow.
+
+    Borrowers block up to ``timeout`` seconds when every connection is in use.
+    Idle connections are pinged before being handed out and transparently
+    reconnected if the server dropped them.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT, **config):
+        if size < 1:
+            raise ValueError("pool size must be >= 1")
+        self.size = size
+        self.timeout = timeout
+        self._config = config
+        self._idle: list = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._stats = {
+            "borrows": 0,
+            "created": 0,
+            "reconnects": 0,
+            "exhausted": 0,
+            "timeouts": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+        }
+
+    def _bump(self, key: str, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self._config)
+        self._bump("created")
+        return conn
+
+    def _healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Error:
+            pass
+        self._bump("reconnects")
+        try:
+            conn.reconnect(attempts=POOL_RECONNECT_ATTEMPTS, delay=0)
+            return conn
+        except Error:
+            try:
+                conn.close()
+            except Error:
+                pass
+            return self._connect()
+
+    def acquire(self, timeout: float | None = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._bump("exhausted")
+            if not self._slots.acquire(timeout=timeout):
+                self._bump("timeouts")
+                raise PoolError(f"No free connection after {timeout:.1f}s (pool size {self.size})")
+        waited = time.perf_counter() - start
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            conn = self._healthy(conn) if conn is not None else self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._stats["borrows"] += 1
+            self._stats["wait_total_s"] += waited
+            self._stats["wait_max_s"] = max(self._stats["wait_max_s"], waited)
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        reusable = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            reusable = False
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append(conn)
+        if not reusable:
+            try:
+                conn.close()
+            except Error:
+                pass
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except Error:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(size=self.size, in_use=self._in_use, idle=len(self._idle))
+        borrows = snapshot["borrows"]
+        snapshot["wait_avg_s"] = snapshot["wait_total_s"] / borrows if borrows else 0.0
+        return snapshot
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                cfg = _base_config()
+                cfg["database"] = DB_NAME
+                _pool = ConnectionPool(**cfg)
+    return _pool
+
+def close_pool():
+    """Close idle pooled connections and drop the pool (it is rebuilt on next use)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+def pool_stats() -> dict:
+    """Borrow/wait/in-use counters for the shared pool."""
+    return get_pool().stats()
+
 def get_connection(include_db: bool = True):
-    cfg = _base_config()
+    """Borrow a pooled connection; call ``close()`` to return it.
+
+    ``include_db=False`` is only used to bootstrap the database itself and
+    opens a dedicated, unpooled connection.
+    """
     if include_db:
-        cfg["database"] = DB_NAME
-    return mysql.connector.connect(**cfg)
+        return get_pool().acquire()
+    return mysql.connector.connect(**_base_config())
+
+@contextmanager
+def _cursor(commit: bool = False):
+    conn = get_connection(include_db=True)
+    try:
+        cur = conn.cursor()
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        finally:
+            cur.close()
+    finally:
+        conn.close()
 
 def ensure_database():
     try:
@@ -33,86 +264,394 @@ def ensure_database():
     except Error as e:
         raise RuntimeError(f"Failed creating database {DB_NAME}: {e}")
 
+# Single schema definition, used by init_db (and so by the async wrappers in db_async.py).
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        session_uuid CHAR(36) NOT NULL UNIQUE,
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        session_uuid CHAR(36) NOT NULL,
+        role ENUM('patient','doctor') NOT NULL,
+        content TEXT NOT NULL,
+        image_path VARCHAR(255),
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_session_id (session_uuid, id),
+        CONSTRAINT fk_session FOREIGN KEY (session_uuid) REFERENCES sessions(session_uuid)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+)
+
 def init_db():
     ensure_database()
     try:
-        conn = get_connection(include_db=True)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                session_uuid CHAR(36) NOT NULL UNIQUE,
-                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS messages (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                session_uuid CHAR(36) NOT NULL,
-                role ENUM('patient','doctor') NOT NULL,
-                content TEXT NOT NULL,
-                image_path VARCHAR(255),
-                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                INDEX (session_uuid),
-                CONSTRAINT fk_session FOREIGN KEY (session_uuid) REFERENCES sessions(session_uuid)
-                    ON DELETE CASCADE ON UPDATE CASCADE
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-            """
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with _cursor(commit=True) as cur:
+            for statement in SCHEMA:
+                cur.execute(statement)
+            _migrate_message_index(cur)
     except Error as e:
         raise RuntimeError(f"Failed initializing tables: {e}")
 
+def _migrate_message_index(cur):
+    """Give tables created before keyset pagination the ``(session_uuid, id)`` index.
+
+    The old single-column ``session_uuid`` index is a prefix of the new one, so
+    it is dropped in the same statement (the foreign key uses the new index).
+    """
+    cur.execute(
+        "SELECT DISTINCT index_name FROM information_schema.statistics "
+        "WHERE table_schema=%s AND table_name='messages'",
+        (DB_NAME,),
+    )
+    indexes = {row[0] for row in cur.fetchall()}
+    if "idx_session_id" in indexes:
+        return
+    alter = "ALTER TABLE messages ADD INDEX idx_session_id (session_uuid, id)"
+    if "session_uuid" in indexes:
+        alter += ", DROP INDEX session_uuid"
+    cur.execute(alter)
+
+def ensure_schema() -> bool:
+    """Run :func:`init_db` once per process; later calls are free. Retries after a failure."""
+    global _schema_ready
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                init_db()
+                _schema_ready = True
+    return _schema_ready
+
+def new_session_id() -> str:
+    """A fresh session id, generated locally; the row is written with the session's first messages."""
+    return str(uuid.uuid4())
+
 def create_session(session_uuid: str | None = None) -> str:
     sid = session_uuid or str(uuid.uuid4())
     try:
-        conn = get_connection(include_db=True)
-        cur = conn.cursor()
-        cur.execute("INSERT IGNORE INTO sessions (session_uuid, created_at) VALUES (%s, %s)", (sid, datetime.utcnow()))
-        conn.commit()
-        cur.close()
-        conn.close()
+        with _cursor(commit=True) as cur:
+            cur.execute(_INSERT_SESSION, (sid, datetime.utcnow()))
+        _known_sessions.set(sid, True)
         return sid
     except Error as e:
         raise RuntimeError(f"Failed creating session: {e}")
 
 def save_message(session_uuid: str, role: str, content: str, image_path: str | None = None):
-    if role not in {"patient", "doctor"}:
+    if role not in _ROLES:
         raise ValueError("role must be 'patient' or 'doctor'")
     try:
-        conn = get_connection(include_db=True)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO messages (session_uuid, role, content, image_path, created_at) VALUES (%s, %s, %s, %s, %s)",
-            (session_uuid, role, content, image_path, datetime.utcnow())
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with metrics.timed("db_write"), _cursor(commit=True) as cur:
+            cur.execute(_INSERT_MESSAGE, (session_uuid, role, content, image_path, datetime.utcnow()))
     except Error as e:
         raise RuntimeError(f"Failed saving message: {e}")
+    finally:
+        _invalidate_recent([session_uuid])
+
+def _message_rows(messages) -> list[tuple]:
+    now = datetime.utcnow()
+    rows = []
+    for message in messages:
+        session_uuid, role, content, *rest = message
+        if role not in _ROLES:
+            raise ValueError("role must be 'patient' or 'doctor'")
+        image_path = rest[0] if rest else None
+        created_at = rest[1] if len(rest) > 1 else now
+        rows.append((session_uuid, role, content, image_path, created_at))
+    return rows
+
+def save_messages_bulk(messages) -> int:
+    """Insert many messages with one ``executemany`` in a single transaction.
 
-def fetch_messages(session_uuid: str) -> list[tuple[str, str]]:
-    """Return list of (role, content) for a session."""
+    ``messages`` yields ``(session_uuid, role, content[, image_path[, created_at]])``
+    tuples. Session rows that this process has not written yet are inserted
+    (``INSERT IGNORE``) in the same transaction, so a locally generated session
+    id needs no separate :func:`create_session` round trip. Returns the number
+    of message rows written.
+    """
+    rows = _message_rows(messages)
+    if not rows:
+        return 0
+    new_sessions = {}
+    for row in rows:
+        if row[0] not in _known_sessions and row[0] not in new_sessions:
+            new_sessions[row[0]] = row[4]
     try:
-        conn = get_connection(include_db=True)
-        cur = conn.cursor()
-        cur.execute("SELECT role, content FROM messages WHERE session_uuid=%s ORDER BY id", (session_uuid,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
+        with metrics.timed("db_write", rows=len(rows)), _cursor(commit=True) as cur:
+            if new_sessions:
+                cur.executemany(_INSERT_SESSION, list(new_sessions.items()))
+            cur.executemany(_INSERT_MESSAGE, rows)
+        for session_uuid in new_sessions:
+            _known_sessions.set(session_uuid, True)
+        return len(rows)
+    except Error as e:
+        raise RuntimeError(f"Failed saving {len(rows)} messages: {e}")
+    finally:
+        _invalidate_recent({row[0] for row in rows})
+
+
+class MessageWriter:
+    """Write-behind queue that coalesces message inserts into batch flushes.
+
+    One background thread drains the queue and writes up to ``batch_size``
+    rows per :func:`save_messages_bulk` call, waiting at most ``interval``
+    seconds after the first queued row. The queue holds ``max_pending`` rows;
+    when it is full ``submit`` blocks for up to ``block_timeout`` seconds and
+    then raises ``queue.Full``. Failed batches are logged and counted.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(
+        self,
+        batch_size: int = DB_WRITE_BATCH,
+        interval: float = DB_WRITE_INTERVAL,
+        max_pending: int = DB_WRITE_QUEUE,
+        block_timeout: float = DB_WRITE_BLOCK_TIMEOUT,
+        write=None,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.block_timeout = block_timeout
+        self._write = write or save_messages_bulk
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "failed": 0, "max_batch": 0, "blocked": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True, name="db-write-behind")
+        self._thread.start()
+
+    def submit(self, session_uuid: str, role: str, content: str, image_path: str | None = None):
+        self.submit_many([(session_uuid, role, content, image_path)])
+
+    def submit_many(self, messages):
+        """Queue messages; rows are timestamped now, not when they are flushed."""
+        if not self._thread.is_alive():
+            raise RuntimeError("Message writer is closed")
+        for row in _message_rows(messages):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                with self._lock:
+                    self._stats["blocked"] += 1
+                self._queue.put(row, timeout=self.block_timeout)
+            with self._lock:
+                self._stats["submitted"] += 1
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write everything queued so far; returns False if ``timeout`` ran out first."""
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done), timeout=timeout)
+        return done.wait(timeout)
+
+    def close(self, timeout: float | None = 10):
+        """Flush pending rows and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put((self._STOP, None), timeout=timeout)
+            self._thread.join(timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
+    def _write_batch(self, batch: list[tuple]):
+        if not batch:
+            return
+        try:
+            self._write(batch)
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += len(batch)
+            logger.warning(f"Write-behind batch of {len(batch)} messages failed: {e}")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.interval
+            while True:
+                if isinstance(item, tuple) and len(item) == 2 and item[0] in (self._FLUSH, self._STOP):
+                    self._write_batch(batch)
+                    batch = []
+                    if item[0] is self._STOP:
+                        return
+                    item[1].set()
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch)
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    self._write_batch(batch)
+                    break
+
+
+_writer: MessageWriter | None = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> MessageWriter:
+    """Shared write-behind writer, started on first use and flushed at interpreter exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = MessageWriter()
+                atexit.register(close_writer)
+    return _writer
+
+def close_writer(timeout: float | None = 10):
+    """Flush and stop the shared writer (a new one is started on next use)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
+
+def log_messages(messages):
+    """Persist a turn's messages: queued when ``DB_WRITE_BEHIND`` is set, else one bulk insert."""
+    if DB_WRITE_BEHIND:
+        get_writer().submit_many(messages)
+    else:
+        save_messages_bulk(messages)
+
+def fetch_messages(session_uuid: str, after_id: int = 0, limit: int | None = None) -> list[tuple[str, str]]:
+    """Return list of (role, content) for a session, oldest first.
+
+    ``after_id``/``limit`` restrict the result to one keyset page; use
+    :func:`fetch_messages_page` when the row ids are needed for the next cursor.
+    """
+    sql = "SELECT role, content FROM messages WHERE session_uuid=%s AND id>%s ORDER BY id"
+    params: tuple = (session_uuid, after_id)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params += (limit,)
+    try:
+        with metrics.timed("db_read"), _cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+    except Error as e:
+        raise RuntimeError(f"Failed fetching messages: {e}")
+
+def fetch_messages_page(session_uuid: str, after_id: int = 0, limit: int = DB_PAGE_SIZE) -> tuple[list[tuple], int | None]:
+    """One keyset page of ``(id, role, content, image_path, created_at)`` rows with ``id > after_id``.
+
+    Returns ``(rows, next_after_id)``; ``next_after_id`` is None on the last page.
+    The ``(session_uuid, id)`` index makes every page an index range scan, so
+    page N costs the same as page 1.
+    """
+    if limit < 1:
+        raise ValueError("limit must be >= 1")
+    try:
+        with metrics.timed("db_read"), _cursor() as cur:
+            cur.execute(
+                f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE session_uuid=%s AND id>%s ORDER BY id LIMIT %s",
+                (session_uuid, after_id, limit + 1),
+            )
+            rows = cur.fetchall()
     except Error as e:
         raise RuntimeError(f"Failed fetching messages: {e}")
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+def fetch_messages_since(session_uuid: str, last_seen_id: int = 0, max_rows: int | None = None) -> tuple[list[tuple], int]:
+    """Rows newer than ``last_seen_id`` and the id to pass next time.
+
+    For clients that already hold the earlier history: only the new rows are
+    read, page by page, up to ``max_rows``.
+    """
+    rows: list[tuple] = []
+    cursor: int | None = last_seen_id
+    while cursor is not None and (max_rows is None or len(rows) < max_rows):
+        limit = DB_PAGE_SIZE if max_rows is None else min(DB_PAGE_SIZE, max_rows - len(rows))
+        page, cursor = fetch_messages_page(session_uuid, after_id=cursor, limit=limit)
+        rows.extend(page)
+    return rows, (rows[-1][0] if rows else last_seen_id)
+
+_recent_cache = LRUCache(max_entries=DB_RECENT_CACHE_SESSIONS, ttl=DB_RECENT_CACHE_TTL)
+# Write generation per session. A miss records it before reading and only fills
+# the cache if no write landed meanwhile, so a read that raced a write cannot
+# cache rows without it.
+_recent_generations = LRUCache(max_entries=DB_RECENT_CACHE_SESSIONS * 4)
+_generation_seq = itertools.count(1)
+_recent_lock = threading.Lock()
+
+def _invalidate_recent(session_uuids):
+    with _recent_lock:
+        for session_uuid in session_uuids:
+            _recent_generations.set(session_uuid, next(_generation_seq))
+            _recent_cache.pop(session_uuid)
+
+def fetch_recent_messages(session_uuid: str, limit: int = DB_RECENT_MESSAGES) -> list[tuple]:
+    """The session's last ``limit`` ``(id, role, content, image_path, created_at)`` rows, oldest first.
+
+    Served from a per-session in-process cache holding the newest
+    ``DB_RECENT_MESSAGES`` rows; writes through this module invalidate it.
+    """
+    if limit > DB_RECENT_MESSAGES:
+        return _fetch_latest(session_uuid, limit)
+    rows = _recent_cache.get(session_uuid)
+    if rows is None:
+        generation = _recent_generations.get(session_uuid)
+        rows = _fetch_latest(session_uuid, DB_RECENT_MESSAGES)
+        with _recent_lock:
+            if _recent_generations.get(session_uuid) == generation:
+                _recent_cache.set(session_uuid, rows)
+    return rows[-limit:] if limit > 0 else []
+
+def _fetch_latest(session_uuid: str, limit: int) -> list[tuple]:
+    try:
+        with metrics.timed("db_read"), _cursor() as cur:
+            cur.execute(
+                f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE session_uuid=%s ORDER BY id DESC LIMIT %s",
+                (session_uuid, limit),
+            )
+            rows = cur.fetchall()
+    except Error as e:
+        raise RuntimeError(f"Failed fetching messages: {e}")
+    rows.reverse()
+    return rows
+
+def recent_cache_stats() -> dict:
+    return _recent_cache.stats()
+
+# Read at scrape time; the pool and writer only report once something created them.
+metrics.register_stats("db_recent_cache", recent_cache_stats, cache=True)
+metrics.register_stats("db_pool", lambda: _pool.stats() if _pool is not None else {})
+metrics.register_stats("db_writer", lambda: _writer.stats() if _writer is not None else {})
 
 __all__ = [
     "init_db",
     "create_session",
+    "ensure_schema",
+    "new_session_id",
     "save_message",
+    "save_messages_bulk",
+    "MessageWriter",
+    "get_writer",
+    "close_writer",
+    "log_messages",
     "fetch_messages",
+    "fetch_messages_page",
+    "fetch_messages_since",
+    "fetch_recent_messages",
+    "recent_cache_stats",
+    "get_connection",
+    "pool_stats",
+    "close_pool",
 ]
\ No newline at end of file
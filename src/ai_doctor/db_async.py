@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import db
+
+# Awaitable variants of the db functions for async callers (FastAPI). mysql.connector
+# is blocking, so each call runs on a worker pool sized to the connection pool
+# (DB_POOL_SIZE): the event loop never waits on MySQL and workers never queue for
+# a connection. Schema, queries, caches and the pool itself are shared with db.py.
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=db.POOL_SIZE, thread_name_prefix="db-async")
+    return _executor
+
+
+async def _run(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def init_db():
+    await _run(db.init_db)
+
+
+async def ensure_schema() -> bool:
+    if db._schema_ready:
+        return True
+    return await _run(db.ensure_schema)
+
+
+async def create_session(session_uuid: str | None = None) -> str:
+    return await _run(db.create_session, session_uuid)
+
+
+async def save_message(session_uuid: str, role: str, content: str, image_path: str | None = None):
+    await _run(db.save_message, session_uuid, role, content, image_path)
+
+
+async def save_messages_bulk(messages) -> int:
+    return await _run(db.save_messages_bulk, list(messages))
+
+
+async def fetch_messages(session_uuid: str, after_id: int = 0, limit: int | None = None) -> list[tuple[str, str]]:
+    return await _run(db.fetch_messages, session_uuid, after_id, limit)
+
+
+async def fetch_messages_page(session_uuid: str, after_id: int = 0, limit: int = db.DB_PAGE_SIZE) -> tuple[list[tuple], int | None]:
+    return await _run(db.fetch_messages_page, session_uuid, after_id, limit)
+
+
+async def fetch_messages_since(session_uuid: str, last_seen_id: int = 0, max_rows: int | None = None) -> tuple[list[tuple], int]:
+    return await _run(db.fetch_messages_since, session_uuid, last_seen_id, max_rows)
+
+
+async def fetch_recent_messages(session_uuid: str, limit: int = db.DB_RECENT_MESSAGES) -> list[tuple]:
+    return await _run(db.fetch_recent_messages, session_uuid, limit)
+
+
+def close():
+    """Stop the worker pool (a new one is created on next use)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+__all__ = [
+    "init_db",
+    "ensure_schema",
+    "create_session",
+    "save_message",
+    "save_messages_bulk",
+    "fetch_messages",
+    "fetch_messages_page",
+    "fetch_messages_since",
+    "fetch_recent_messages",
+    "close",
+]
@@ -0,0 +1,131 @@
+import os
+import threading
+
+from . import metrics
+from .cache import LRUCache
+
+# langdetect is only consulted when the STT provider did not report a language.
+# Its profiles load on first use (or via warm_language_detector) and the seed
+# makes results deterministic; short texts are memoized.
+LANGDETECT_SEED = int(os.environ.get("LANGDETECT_SEED", 0))
+LANGDETECT_MEMO_CHARS = int(os.environ.get("LANGDETECT_MEMO_CHARS", 200))
+LANGDETECT_MEMO_SIZE = int(os.environ.get("LANGDETECT_MEMO_SIZE", 4096))
+DEFAULT_LANGUAGE = "en"
+
+# Whisper reports languages by name ("english"); callers expect ISO 639-1 codes.
+WHISPER_LANGUAGES = {
+    "english": "en", "chinese": "zh", "german": "de", "spanish": "es", "russian": "ru",
+    "korean": "ko", "french": "fr", "japanese": "ja", "portuguese": "pt", "turkish": "tr",
+    "polish": "pl", "catalan": "ca", "dutch": "nl", "arabic": "ar", "swedish": "sv",
+    "italian": "it", "indonesian": "id", "hindi": "hi", "finnish": "fi", "vietnamese": "vi",
+    "hebrew": "he", "ukrainian": "uk", "greek": "el", "malay": "ms", "czech": "cs",
+    "romanian": "ro", "danish": "da", "hungarian": "hu", "tamil": "ta", "norwegian": "no",
+    "thai": "th", "urdu": "ur", "croatian": "hr", "bulgarian": "bg", "lithuanian": "lt",
+    "latin": "la", "maori": "mi", "malayalam": "ml", "welsh": "cy", "slovak": "sk",
+    "telugu": "te", "persian": "fa", "latvian": "lv", "bengali": "bn", "serbian": "sr",
+    "azerbaijani": "az", "slovenian": "sl", "kannada": "kn", "estonian": "et", "macedonian": "mk",
+    "breton": "br", "basque": "eu", "icelandic": "is", "armenian": "hy", "nepali": "ne",
+    "mongolian": "mn", "bosnian": "bs", "kazakh": "kk", "albanian": "sq", "swahili": "sw",
+    "galician": "gl", "marathi": "mr", "punjabi": "pa", "sinhala": "si", "khmer": "km",
+    "shona": "sn", "yoruba": "yo", "somali": "so", "afrikaans": "af", "occitan": "oc",
+    "georgian": "ka", "belarusian": "be", "tajik": "tg", "sindhi": "sd", "gujarati": "gu",
+    "amharic": "am", "yiddish": "yi", "lao": "lo", "uzbek": "uz", "faroese": "fo",
+    "haitian creole": "ht", "pashto": "ps", "turkmen": "tk", "nynorsk": "nn", "maltese": "mt",
+    "sanskrit": "sa", "luxembourgish": "lb", "myanmar": "my", "tibetan": "bo", "tagalog": "tl",
+    "malagasy": "mg", "assamese": "as", "tatar": "tt", "hawaiian": "haw", "lingala": "ln",
+    "hausa": "ha", "bashkir": "ba", "javanese": "jw", "sundanese": "su", "cantonese": "yue",
+}
+_CODES = set(WHISPER_LANGUAGES.values())
+
+_memo = LRUCache(max_entries=LANGDETECT_MEMO_SIZE)
+_detector_ready = False
+_detector_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"provider": 0, "memo_hits": 0, "detections": 0, "fallbacks": 0}
+
+
+def _bump(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def normalize_language(value) -> str | None:
+    """ISO 639-1 code for a provider language (``"english"``, ``"en"``, ``"EN"``), else None."""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip().lower()
+    if value in _CODES:
+        return value
+    return WHISPER_LANGUAGES.get(value)
+
+
+def warm_language_detector():
+    """Load langdetect's profiles and fix its seed; runs once, later calls are free."""
+    global _detector_ready
+    if _detector_ready:
+        return
+    with _detector_lock:
+        if not _detector_ready:
+            from langdetect import DetectorFactory
+            from langdetect.detector_factory import init_factory
+
+            DetectorFactory.seed = LANGDETECT_SEED
+            init_factory()
+            _detector_ready = True
+
+
+def _langdetect(text: str) -> str | None:
+    warm_language_detector()
+    from langdetect import detect, LangDetectException
+
+    try:
+        return detect(text)
+    except LangDetectException:
+        return None
+
+
+def detect_language(text: str, provider_language=None, default: str = DEFAULT_LANGUAGE) -> str:
+    """Language code for ``text``: the provider's answer when it gave one, else langdetect.
+
+    Texts up to ``LANGDETECT_MEMO_CHARS`` characters are memoized, so repeated
+    short phrases (greetings, canned replies) skip detection entirely.
+    """
+    code = normalize_language(provider_language)
+    if code:
+        _bump("provider")
+        return code
+    text = (text or "").strip()
+    if not text:
+        return default
+    memoize = len(text) <= LANGDETECT_MEMO_CHARS
+    if memoize:
+        cached = _memo.get(text)
+        if cached is not None:
+            _bump("memo_hits")
+            return cached
+    try:
+        code = _langdetect(text)
+    except Exception:
+        code = None
+    _bump("detections" if code else "fallbacks")
+    code = code or default
+    if memoize:
+        _memo.set(text, code)
+    return code
+
+
+def language_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, memo_entries=len(_memo))
+
+
+metrics.register_stats("langdetect", language_stats)
+
+
+__all__ = [
+    "detect_language",
+    "normalize_language",
+    "warm_language_detector",
+    "language_stats",
+    "WHISPER_LANGUAGES",
+]
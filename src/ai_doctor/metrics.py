@@ -0,0 +1,384 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Process-local Prometheus-style metrics. Everything here is stdlib so any
+# module can import it without slowing down `import src.ai_doctor.api`.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+# Spans go through the OpenTelemetry API when it is installed (the exporter is
+# whatever SDK the deployment configures); set OTEL_TRACING=0 to skip them.
+OTEL_TRACING = os.environ.get("OTEL_TRACING", "1").lower() not in ("0", "false", "no", "off")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1 KiB .. 1 GiB
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+
+class Counter(_Metric):
+    """Monotonic count per label set (``inc(amount, **labels)``)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set (``observe(value, **labels)``)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+                    break
+            counts[1] += value
+            counts[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return counts[2] if counts else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, ([*c[0]], c[1], c[2])) for key, c in self._values.items())
+        lines = []
+        for key, (buckets, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and stats collectors and renders the Prometheus text format.
+
+    Components that already keep their own counters (caches, the DB pool, the
+    write-behind queue) register a ``stats()`` callable instead of double
+    counting; it is read at scrape time. Numeric entries become the gauge
+    ``ai_doctor_component_stat{component, stat}``; for caches ``hits`` and
+    ``misses`` are also exported as ``ai_doctor_cache_{hits,misses}_total``.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: dict[str, tuple[Callable[[], dict], bool]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_stats(self, component: str, stats: Callable[[], dict], cache: bool = False):
+        with self._lock:
+            self._collectors[component] = (stats, cache)
+
+    def _collect(self) -> list[str]:
+        with self._lock:
+            collectors = sorted(self._collectors.items())
+        gauges, hits, misses = [], [], []
+        for component, (stats, cache) in collectors:
+            try:
+                values = stats() or {}
+            except Exception as e:
+                logger.debug(f"stats collector {component} failed: {e}")
+                continue
+            for stat, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                gauges.append(f'ai_doctor_component_stat{{component="{component}",stat="{stat}"}} {_number(value)}')
+            if cache:
+                hits.append(f'ai_doctor_cache_hits_total{{cache="{component}"}} {_number(values.get("hits", 0))}')
+                misses.append(f'ai_doctor_cache_misses_total{{cache="{component}"}} {_number(values.get("misses", 0))}')
+        lines = []
+        if gauges:
+            lines += ["# HELP ai_doctor_component_stat Internal counters and sizes reported by each component.",
+                      "# TYPE ai_doctor_component_stat gauge", *gauges]
+        if hits:
+            lines += ["# HELP ai_doctor_cache_hits_total Cache lookups answered from the cache.",
+                      "# TYPE ai_doctor_cache_hits_total counter", *hits,
+                      "# HELP ai_doctor_cache_misses_total Cache lookups that fell through.",
+                      "# TYPE ai_doctor_cache_misses_total counter", *misses]
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        lines += self._collect()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "ai_doctor_stage_seconds", "Wall time of one pipeline stage (stt, llm, tts, db_write, ...).", ["stage"]
+)
+STAGE_ERRORS = registry.counter("ai_doctor_stage_errors_total", "Stage calls that raised.", ["stage"])
+PAYLOAD_BYTES = registry.histogram(
+    "ai_doctor_payload_bytes", "Size of payloads sent to or received from providers.", ["kind"], buckets=BYTES_BUCKETS
+)
+FALLBACKS = registry.counter(
+    "ai_doctor_fallbacks_total", "Requests served by a fallback path (e.g. OpenAI TTS -> gTTS).", ["path", "reason"]
+)
+HTTP_SECONDS = registry.histogram(
+    "ai_doctor_http_request_seconds", "FastAPI request latency by route.", ["method", "route", "status"]
+)
+
+
+def observe(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def payload(kind: str, size: int):
+    PAYLOAD_BYTES.observe(size, kind=kind)
+
+
+def fallback(path: str, reason: str):
+    FALLBACKS.inc(path=path, reason=reason)
+
+
+def register_stats(component: str, stats: Callable[[], dict], cache: bool = False):
+    registry.register_stats(component, stats, cache=cache)
+
+
+def render() -> str:
+    return registry.render()
+
+
+# --- tracing -----------------------------------------------------------------
+
+_tracer = None
+_tracer_loaded = False
+
+
+def _get_tracer():
+    global _tracer, _tracer_loaded
+    if not _tracer_loaded:
+        if OTEL_TRACING:
+            try:
+                from opentelemetry import trace
+
+                _tracer = trace.get_tracer("ai_doctor")
+            except ImportError:
+                _tracer = None
+        _tracer_loaded = True
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Child span of the current one; a no-op context without opentelemetry."""
+    tracer = _get_tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def start_span(name: str, **attributes):
+    """Root span for work that outlives one call stack (e.g. a streamed turn); end it with :func:`end_span`."""
+    tracer = _get_tracer()
+    return tracer.start_span(name, attributes=attributes) if tracer is not None else None
+
+
+def end_span(current, error: BaseException | None = None):
+    if current is None:
+        return
+    if error is not None:
+        current.record_exception(error)
+        from opentelemetry.trace import Status, StatusCode
+
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+    current.end()
+
+
+@contextmanager
+def use_span(current):
+    """Make ``current`` the active span for the block (spans created inside become its children)."""
+    if current is None:
+        yield
+        return
+    from opentelemetry import trace
+
+    with trace.use_span(current, end_on_exit=False):
+        yield
+
+
+def in_span(current, fn: Callable) -> Callable:
+    """Wrap ``fn`` so it runs under ``current`` on whatever thread calls it (executor jobs)."""
+    if current is None:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with use_span(current):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def iter_in_span(current, iterable: Iterable) -> Iterator:
+    """Iterate ``iterable`` with ``current`` active only while each item is produced.
+
+    Generator handlers may be resumed on a different thread after every
+    ``yield``, so the span is attached and detached around each step rather
+    than held across them.
+    """
+    iterator = iter(iterable)
+    while True:
+        with use_span(current):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def timed(stage: str, **attributes):
+    """Time a block into ``ai_doctor_stage_seconds{stage}``, count errors, and trace it as a span."""
+    start = time.perf_counter()
+    with span(stage, **attributes):
+        try:
+            yield
+        except BaseException:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            observe(stage, time.perf_counter() - start)
+
+
+# --- standalone exporter ------------------------------------------------------
+
+def serve(port: int, host: str = "0.0.0.0"):
+    """Serve ``/metrics`` from a daemon thread, for processes without the FastAPI app (the Gradio UI)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-exporter").start()
+    return server
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "Registry",
+    "registry",
+    "observe",
+    "payload",
+    "fallback",
+    "register_stats",
+    "render",
+    "span",
+    "start_span",
+    "end_span",
+    "use_span",
+    "in_span",
+    "iter_in_span",
+    "timed",
+    "serve",
+    "CONTENT_TYPE",
+]
@@ -0,0 +1,331 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from . import metrics
+
+# Opt-in request profiling. PROFILE_SAMPLE_RATE is the fraction of API requests
+# and Gradio turns that get profiled (0 = off). Only PROFILE_MAX_CONCURRENT
+# profiles run at a time; requests sampled while the slots are busy run unprofiled.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# "sample": a thread snapshots every thread's stack each PROFILE_INTERVAL_MS
+#   (sees executor/TTS/DB worker threads too; written as collapsed stacks).
+# "cprofile": deterministic cProfile of the handler's own thread (.prof for pstats/snakeviz).
+#   Gradio handlers only: API requests share the event-loop thread with every other
+#   in-flight request, so they are always stack-sampled.
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample").lower()
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_MEMORY = os.environ.get("PROFILE_MEMORY", "1").lower() not in ("0", "false", "no", "off")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join("outputs", "profiles"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 100))
+PROFILE_MAX_CONCURRENT = int(os.environ.get("PROFILE_MAX_CONCURRENT", 1))
+PROFILE_TOP = 25
+
+HEADER = "X-Profile-Id"
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of threads that are parked, not working; their samples are counted as idle.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socketserver.py", "serve_forever"),
+    ("thread.py", "_worker"),
+}
+
+
+# tracemalloc is process-wide: started by the first concurrent profile, stopped by
+# the last one, and left alone if something else turned it on.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _tracemalloc_acquire():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _tracemalloc_release():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """Collects collapsed stacks of every other thread until stopped."""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                self.samples += 1
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    self.idle += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def top(self, limit: int) -> list[dict]:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return [{"function": name, "self_samples": n, "total_samples": total[name]} for name, n in own.most_common(limit)]
+
+
+class ProfileSession:
+    """One profiled request: :meth:`stop` on the thread that started it, then :meth:`save`."""
+
+    def __init__(self, profiler: "RequestProfiler", name: str, mode: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.mode = mode
+        self._profiler = profiler
+        self._started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._sampler: _StackSampler | None = None
+        self._cprofile = None
+        self._report: dict | None = None
+        if PROFILE_MEMORY:
+            _tracemalloc_acquire()
+            tracemalloc.reset_peak()
+            self._memory_start = tracemalloc.get_traced_memory()[0]
+        if mode == "cprofile":
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self.resume()
+        else:
+            self._sampler = _StackSampler(PROFILE_INTERVAL_MS / 1000)
+            self._sampler.start()
+
+    def resume(self):
+        """cProfile only sees its own thread: re-enable it wherever a generator handler resumes."""
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def pause(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def stop(self, **extra) -> dict:
+        if self._report is not None:
+            return self._report
+        self.pause()
+        if self._sampler is not None:
+            self._sampler.stop()
+        report = {
+            "id": self.id,
+            "name": self.name,
+            "mode": self.mode,
+            "started_at": self._started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - self._start) * 1000, 2),
+            **extra,
+        }
+        if PROFILE_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            report["memory"] = {"peak_bytes": peak - self._memory_start, "net_bytes": current - self._memory_start}
+            _tracemalloc_release()
+        if self._sampler is not None:
+            report.update(samples=self._sampler.samples, idle_samples=self._sampler.idle, top=self._sampler.top(PROFILE_TOP))
+        self._report = report
+        self._profiler._release()
+        return report
+
+    def save(self) -> str | None:
+        """Write the report (and stacks or pstats) under PROFILE_DIR; returns the JSON path."""
+        report = self.stop()
+        try:
+            os.makedirs(self._profiler.directory, exist_ok=True)
+            stem = os.path.join(self._profiler.directory, f"{self._started_at:%Y%m%dT%H%M%S%f}_{self.id}")
+            if self._cprofile is not None:
+                import io
+                import pstats
+
+                self._cprofile.dump_stats(stem + ".prof")
+                out = io.StringIO()
+                pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+                report["top"] = out.getvalue().strip().splitlines()
+            elif self._sampler is not None:
+                with open(stem + ".folded", "w", encoding="utf-8") as fh:
+                    for stack, count in self._sampler.stacks.most_common():
+                        fh.write(f"{stack} {count}\n")
+            with open(stem + ".json", "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            self._profiler._rotate()
+        except OSError as e:
+            logger.warning(f"profile {self.id}: could not write results: {e}")
+            return None
+        memory = report.get("memory")
+        peak = f", peak {memory['peak_bytes'] / 1048576:.1f}MiB" if memory else ""
+        logger.info(f"profile {self.id} {self.name}: {report['duration_ms']:.0f}ms{peak} -> {stem}.json")
+        return stem + ".json"
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the newest ``keep`` profiles in ``directory``."""
+
+    def __init__(
+        self,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        directory: str = PROFILE_DIR,
+        keep: int = PROFILE_KEEP,
+        mode: str = PROFILE_MODE,
+        max_concurrent: int = PROFILE_MAX_CONCURRENT,
+    ):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.keep = keep
+        self.mode = mode
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._lock = threading.Lock()
+        self._stats = {"profiled": 0, "busy": 0}
+
+    def _bump(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def start(self, name: str, mode: str | None = None) -> ProfileSession | None:
+        """A running session if this request is sampled and a slot is free, else None.
+
+        ``mode`` overrides the configured mode for this session.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._slots.acquire(blocking=False):
+            self._bump("busy")
+            return None
+        try:
+            session = ProfileSession(self, name, mode or self.mode)
+        except Exception:
+            self._slots.release()
+            raise
+        self._bump("profiled")
+        return session
+
+    def _release(self):
+        self._slots.release()
+
+    def _rotate(self):
+        try:
+            entries = sorted(
+                (e for e in os.scandir(self.directory) if e.is_file() and e.name.endswith(".json")),
+                key=lambda e: e.name,
+            )
+        except OSError:
+            return
+        for entry in entries[: max(0, len(entries) - self.keep)]:
+            stem = entry.path[: -len(".json")]
+            for suffix in (".json", ".folded", ".prof"):
+                try:
+                    os.remove(stem + suffix)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+profiler = RequestProfiler()
+metrics.register_stats("profiler", profiler.stats)
+
+
+def profile_handler(fn, name: str | None = None):
+    """Wrap a Gradio handler (plain or generator function) so sampled calls are profiled.
+
+    Generator handlers are profiled from the first step to exhaustion; the
+    profile id is logged, since Gradio responses carry no headers.
+    """
+    name = name or fn.__name__
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            session = profiler.start(name)
+            if session is None:
+                yield from fn(*args, **kwargs)
+                return
+            gen = fn(*args, **kwargs)
+            try:
+                while True:
+                    session.resume()
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        session.pause()
+                    yield item
+            finally:
+                gen.close()
+                session.save()
+
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = profiler.start(name)
+        if session is None:
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.save()
+
+    return wrapper
+
+
+__all__ = [
+    "RequestProfiler",
+    "ProfileSession",
+    "profiler",
+    "profile_handler",
+    "HEADER",
+]
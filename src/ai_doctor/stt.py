@@ -1,27 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import json
 import logging
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from . import clients, metrics
+from .cache import LRUCache
+from .language import detect_language, normalize_language
+
+# numpy, pydub, speech_recognition, langdetect and the Groq SDK are imported
+# inside the functions that need them, so importing this module (e.g. from the
+# FastAPI app) stays cheap. Logging is configured by the entry points.
+if TYPE_CHECKING:
+    import numpy as np
+    from groq import Groq
+    from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+STT_MAX_WORKERS = int(os.environ.get("STT_MAX_WORKERS", 8))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+# Transcription cache: in-memory LRU, plus an optional SQLite file shared across restarts.
+STT_CACHE_SIZE = int(os.environ.get("STT_CACHE_SIZE", 256))
+STT_CACHE_TTL = float(os.environ.get("STT_CACHE_TTL", 7 * 24 * 3600))
+STT_CACHE_DB = os.environ.get("STT_CACHE_DB") or None
+STT_CACHE_DB_MAX_ROWS = int(os.environ.get("STT_CACHE_DB_MAX_ROWS", 10000))
+
+# Chunked mode for long recordings: window length, overlap between fixed windows, parallel uploads.
+STT_CHUNK_MS = int(os.environ.get("STT_CHUNK_MS", 120_000))
+STT_CHUNK_OVERLAP_MS = int(os.environ.get("STT_CHUNK_OVERLAP_MS", 2_000))
+STT_CHUNK_WORKERS = int(os.environ.get("STT_CHUNK_WORKERS", 4))
+
+# Voice-activity detection before upload (opt-in).
+STT_VAD = os.environ.get("STT_VAD", "").lower() in {"1", "true", "yes"}
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-import speech_recognition as sr
-from pydub import AudioSegment
-from groq import Groq
-from langdetect import detect, LangDetectException
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+def transcription_cache_key(content_hash: str, **options) -> str:
+    """Cache key for an audio content hash plus the request options that change the output."""
+    payload = json.dumps({"sha256": content_hash, **options}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """Content-addressed cache of ``(text, language)`` transcription results.
+
+    Lookups hit the in-memory LRU first, then the SQLite tier when ``db_path``
+    is set. Both tiers expire entries after ``ttl`` seconds; the SQLite tier
+    keeps at most ``db_max_rows`` rows, dropping the least recently used.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = STT_CACHE_SIZE,
+        ttl: float = STT_CACHE_TTL,
+        db_path: Optional[str] = STT_CACHE_DB,
+        db_max_rows: int = STT_CACHE_DB_MAX_ROWS,
+    ):
+        self.ttl = ttl
+        self.db_max_rows = db_max_rows
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0}
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS transcriptions ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, language TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _count(self, *keys: str):
+        with self._db_lock:
+            for key in keys:
+                self._counts[key] += 1
+
+    def get(self, key: str) -> Optional[tuple[str, str]]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._count("hits", "memory_hits")
+            return value
+        if self._db is not None:
+            now = time.time()
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT text, language FROM transcriptions WHERE key=? AND created_at>=?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row:
+                    self._db.execute("UPDATE transcriptions SET accessed_at=? WHERE key=?", (now, key))
+                    self._db.commit()
+            if row:
+                value = (row[0], row[1])
+                self._memory.set(key, value)
+                self._count("hits", "disk_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def put(self, key: str, value: tuple[str, str]):
+        self._memory.set(key, value)
+        if self._db is None:
+            return
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcriptions (key, text, language, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value[0], value[1], now, now),
+            )
+            self._db.execute("DELETE FROM transcriptions WHERE created_at<?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM transcriptions WHERE key IN ("
+                "SELECT key FROM transcriptions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.db_max_rows,),
+            )
+            self._db.commit()
+
+    def clear(self):
+        self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM transcriptions")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._db_lock:
+            counts = dict(self._counts)
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0] if self._db else 0
+        memory = self._memory.stats()
+        counts.update(memory_entries=memory["entries"], memory_evictions=memory["evictions"], disk_entries=disk_entries)
+        return counts
+
+
+transcription_cache = TranscriptionCache()
+
+
+def transcription_cache_stats() -> dict:
+    """Hit/miss counters and entry counts for the shared transcription cache."""
+    return transcription_cache.stats()
+
+
+metrics.register_stats("stt_cache", transcription_cache_stats, cache=True)
 
 def record_audio(file_path: str, timeout: int = 20, phrase_time_limit: int | None = None) -> str:
+    import speech_recognition as sr
+    from pydub import AudioSegment
+
     recognizer = sr.Recognizer()
     with sr.Microphone() as source:
-        logging.info("Adjusting for ambient noise...")
+        logger.info("Adjusting for ambient noise...")
         recognizer.adjust_for_ambient_noise(source, duration=1)
-        logging.info("Start speaking now...")
+        logger.info("Start speaking now...")
         audio_data = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
     wav_data = audio_data.get_wav_data()
     audio_segment = AudioSegment.from_wav(BytesIO(wav_data))
     audio_segment.export(file_path, format="mp3", bitrate="128k")
-    logging.info(f"Audio saved to {file_path}")
+    logger.info(f"Audio saved to {file_path}")
     return file_path
 
 def transcribe_with_groq(stt_model: str, audio_filepath: str, GROQ_API_KEY: str) -> tuple[str, str]:
@@ -37,11 +195,11 @@ def transcribe_with_groq(stt_model: str, audio_filepath: str, GROQ_API_KEY: str)
 
 
 def groq_client(api_key: Optional[str] = None) -> Groq:
-    """Create a Groq client using explicit or environment API key."""
+    """Return the shared Groq client for the explicit or environment API key."""
     key = api_key or os.environ.get("GROQ_API_KEY")
     if not key:
         raise RuntimeError("GROQ_API_KEY missing. Set env var or pass api_key.")
-    return Groq(api_key=key)
+    return clients.groq_client(key)
 
 
 def groq_transcribe(
@@ -55,22 +213,73 @@ def groq_transcribe(
     timestamp_granularities: Optional[Iterable[str]] = None,
     temperature: float = 0.0,
     api_key: Optional[str] = None,
+    use_cache: bool = True,
+    content_hash: Optional[str] = None,
 ) -> tuple[str, str]:
     """Transcribe audio using Groq.
 
     Returns (text, detected_language_code).
 
     Parameters mirror Groq API docs. If both file_path and url are given, file_path wins.
+    File uploads are served from :data:`transcription_cache` when the same audio
+    content was already transcribed with the same options; pass ``content_hash``
+    (SHA-256 hex) when the caller already computed it. URLs are never cached.
     """
-    client = groq_client(api_key)
-
     if not file_path and not url:
         raise ValueError("Provide either file_path or url for transcription.")
 
-    file_obj = None
-    if file_path:
-        file_obj = open(file_path, "rb")
+    if timestamp_granularities:
+        timestamp_granularities = list(timestamp_granularities)
+
+    cache_key = None
+    if use_cache and file_path:
+        cache_key = transcription_cache_key(
+            content_hash or file_sha256(file_path),
+            model=model,
+            language=language,
+            prompt=prompt,
+            response_format=response_format,
+            timestamp_granularities=timestamp_granularities or [],
+            temperature=temperature,
+        )
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    client = groq_client(api_key)
+    transcription = _create_transcription(
+        client,
+        file_path=file_path,
+        url=url,
+        model=model,
+        language=language,
+        prompt=prompt,
+        response_format=response_format,
+        timestamp_granularities=timestamp_granularities,
+        temperature=temperature,
+    )
+    text = _response_text(transcription)
+    # A language the caller forced or the provider reported (verbose_json) beats guessing.
+    detected_language = detect_language(text, provider_language=language or _response_language(transcription))
+
+    if cache_key is not None:
+        transcription_cache.put(cache_key, (text, detected_language))
+    return text, detected_language
+
 
+def _create_transcription(
+    client: Groq,
+    *,
+    file_path: Optional[str],
+    url: Optional[str],
+    model: str,
+    language: Optional[str],
+    prompt: Optional[str],
+    response_format: str,
+    timestamp_granularities: Optional[list[str]],
+    temperature: float,
+):
+    """Issue one transcription request and return the raw SDK response."""
     kwargs = {
         "model": model,
         "temperature": temperature,
@@ -82,29 +291,60 @@ def groq_transcribe(
         kwargs["language"] = language
     if timestamp_granularities and response_format == "verbose_json":
         kwargs["timestamp_granularities"] = list(timestamp_granularities)
-    if file_obj:
-        kwargs["file"] = file_obj
-    elif url:
-        kwargs["url"] = url
 
-    transcription = client.audio.transcriptions.create(**kwargs)
+    with metrics.timed("stt", model=model):
+        if file_path:
+            metrics.payload("stt_upload", os.path.getsize(file_path))
+            with open(file_path, "rb") as file_obj:
+                return client.audio.transcriptions.create(file=file_obj, **kwargs)
+        # groq 0.15 has no `url` keyword; the API takes it as a plain form field.
+        from groq import NOT_GIVEN
 
-    text = getattr(transcription, "text", None) or (
-        isinstance(transcription, dict) and transcription.get("text")
-    ) or str(transcription)
+        return client.audio.transcriptions.create(file=NOT_GIVEN, extra_body={"url": url}, **kwargs)
 
-    detected_language = "en"
-    try:
-        if text and text.strip():
-            detected_language = detect(text)
-    except LangDetectException:
-        pass
-    except Exception:
-        pass
 
-    if file_obj:
-        file_obj.close()
-    return text, detected_language
+def _response_text(response) -> str:
+    return getattr(response, "text", None) or (
+        isinstance(response, dict) and response.get("text")
+    ) or str(response)
+
+
+def _response_dict(response) -> dict:
+    if isinstance(response, dict):
+        return response
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return {"text": _response_text(response)}
+
+
+def _response_language(response) -> Optional[str]:
+    language = getattr(response, "language", None)
+    if language is None and isinstance(response, dict):
+        language = response.get("language")
+    if language is None and hasattr(response, "model_extra"):
+        language = (response.model_extra or {}).get("language")
+    return language
+
+
+def _stt_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=STT_MAX_WORKERS, thread_name_prefix="stt")
+    return _executor
+
+
+async def groq_transcribe_async(*, timeout: Optional[float] = None, **kwargs) -> tuple[str, str]:
+    """Awaitable :func:`groq_transcribe` that keeps the event loop free.
+
+    The blocking SDK call runs on a bounded worker pool (``STT_MAX_WORKERS``).
+    Raises ``asyncio.TimeoutError`` after ``timeout`` seconds; the worker thread
+    finishes the in-flight HTTP call in the background and its result is dropped.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_stt_executor(), functools.partial(groq_transcribe, **kwargs))
+    return await asyncio.wait_for(future, timeout)
 
 
 def groq_translate(
@@ -129,18 +369,22 @@ def groq_translate(
     if file_path:
         file_obj = open(file_path, "rb")
 
+    # groq 0.15's translations.create takes neither `language` nor `url`; both go
+    # through as plain form fields, as for transcriptions.
+    from groq import NOT_GIVEN
+
+    form = {"language": "en"}
+    if not file_obj:
+        form["url"] = url
     kwargs = {
         "model": model,
-        "language": "en",
         "response_format": response_format,
         "temperature": temperature,
+        "file": file_obj or NOT_GIVEN,
+        "extra_body": form,
     }
     if prompt:
         kwargs["prompt"] = prompt
-    if file_obj:
-        kwargs["file"] = file_obj
-    elif url:
-        kwargs["url"] = url
 
     translation = client.audio.translations.create(**kwargs)
     text = getattr(translation, "text", None) or (
@@ -157,18 +401,127 @@ def preprocess_audio(
     sample_rate: int = 16000,
     channels: int = 1,
     export_format: str = "flac",
+    vad: bool = False,
 ) -> str:
     """Downsample + mono-convert audio for optimal STT.
 
-    Uses pydub (ffmpeg backend). Returns path to processed file.
+    Uses pydub (ffmpeg backend). With ``vad=True`` silences are trimmed with
+    :func:`vad_trim` and the amount removed is logged. Returns path to processed file.
     """
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_file(input_path)
     audio = audio.set_frame_rate(sample_rate).set_channels(channels)
+    if vad:
+        audio, report = vad_trim(audio)
+        logger.info(f"VAD removed {report['removed_ms'] / 1000:.1f}s of {report['original_ms'] / 1000:.1f}s from {input_path}")
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     audio.export(output_path, format=export_format)
     return output_path
 
 
+def speech_frames(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 30,
+    energy_margin_db: float = 10.0,
+    zcr_threshold: float = 0.25,
+) -> np.ndarray:
+    """Classify fixed-size frames of mono float samples as speech (True) or silence.
+
+    A frame is speech when its RMS level is ``energy_margin_db`` above the
+    estimated noise floor, or within 6 dB of that threshold with a high
+    zero-crossing rate (unvoiced consonants such as "s" and "f").
+    """
+    import numpy as np
+
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+    frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    level_db = 20 * np.log10(rms + 1e-10)
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+
+    noise_floor = np.percentile(level_db, 10)
+    threshold = max(noise_floor + energy_margin_db, level_db.max() - 50.0)
+    return (level_db > threshold) | ((level_db > threshold - 6.0) & (zcr > zcr_threshold))
+
+
+def vad_trim(
+    audio: AudioSegment,
+    frame_ms: int = 30,
+    padding_ms: int = 150,
+    max_silence_ms: int = 700,
+    **detector_kwargs,
+) -> tuple[AudioSegment, dict]:
+    """Drop leading/trailing silence and shorten internal pauses to ``max_silence_ms``.
+
+    Speech runs are padded by ``padding_ms`` so word edges survive. Returns the
+    trimmed audio and a report of how much was removed. Audio without any
+    detected speech is returned unchanged.
+    """
+    import numpy as np
+
+    channels = audio.channels
+    raw = np.array(audio.get_array_of_samples())
+    interleaved = raw.reshape(-1, channels)
+    mono = interleaved.mean(axis=1) / float(1 << (8 * audio.sample_width - 1))
+
+    is_speech = speech_frames(mono, audio.frame_rate, frame_ms=frame_ms, **detector_kwargs)
+    original_ms = len(audio)
+    report = {"original_ms": original_ms, "kept_ms": original_ms, "removed_ms": 0, "removed_ratio": 0.0, "speech_runs": 0}
+    if not is_speech.any():
+        return audio, report
+
+    pad = padding_ms // frame_ms
+    if pad:
+        is_speech = np.convolve(is_speech, np.ones(2 * pad + 1), mode="same") > 0
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    # Keep each speech run plus up to max_silence_ms of the pause that follows it.
+    max_gap = max_silence_ms // frame_ms
+    gaps = np.append(starts[1:] - ends[:-1], 0)
+    keep_until = ends + np.minimum(gaps, max_gap)
+
+    frame_len = int(audio.frame_rate * frame_ms / 1000)
+    pieces = [interleaved[s * frame_len:e * frame_len] for s, e in zip(starts, keep_until)]
+    trimmed = audio._spawn(np.concatenate(pieces).astype(raw.dtype).tobytes())
+
+    kept_ms = len(trimmed)
+    report.update(
+        kept_ms=kept_ms,
+        removed_ms=original_ms - kept_ms,
+        removed_ratio=round((original_ms - kept_ms) / original_ms, 3) if original_ms else 0.0,
+        speech_runs=int(len(starts)),
+    )
+    return trimmed, report
+
+
+def vad_trim_file(
+    input_path: str,
+    output_path: str,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    export_format: str = "flac",
+    **vad_kwargs,
+) -> dict:
+    """Normalise ``input_path`` like :func:`preprocess_audio`, trim silence and export.
+
+    Returns the :func:`vad_trim` report.
+    """
+    from pydub import AudioSegment
+
+    with metrics.timed("vad"):
+        audio = AudioSegment.from_file(input_path).set_frame_rate(sample_rate).set_channels(channels)
+        trimmed, report = vad_trim(audio, **vad_kwargs)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        trimmed.export(output_path, format=export_format)
+    return report
+
+
 def analyze_verbose_segments(verbose_json: dict) -> list[dict]:
     """Extract and annotate segment-level metadata from a verbose_json response.
 
@@ -204,11 +557,168 @@ def analyze_verbose_segments(verbose_json: dict) -> list[dict]:
     return segments
 
 
+
+def plan_chunks(
+    audio: AudioSegment,
+    chunk_ms: int = STT_CHUNK_MS,
+    overlap_ms: int = STT_CHUNK_OVERLAP_MS,
+    split: str = "silence",
+    min_silence_ms: int = 400,
+) -> list[dict]:
+    """Plan chunk boundaries for ``audio``.
+
+    Each chunk is a dict with ``start``/``end`` (the audio actually sent) and
+    ``own_start``/``own_end`` (the span whose segments the chunk contributes
+    when stitching). ``split="silence"`` cuts inside the last pause found in the
+    final quarter of each window and falls back to a hard cut; hard cuts are
+    padded by ``overlap_ms`` so words straddling them are heard in full by one side.
+    """
+    from pydub.silence import detect_silence
+
+    if split not in {"silence", "fixed"}:
+        raise ValueError("split must be 'silence' or 'fixed'")
+    duration = len(audio)
+    if duration <= chunk_ms:
+        return [{"index": 0, "start": 0, "end": duration, "own_start": 0, "own_end": duration}]
+
+    cuts: list[tuple[int, bool]] = []
+    position = 0
+    while position + chunk_ms < duration:
+        target = position + chunk_ms
+        cut, clean = target, False
+        if split == "silence":
+            search_from = target - chunk_ms // 4
+            window = audio[search_from:target]
+            pauses = detect_silence(window, min_silence_len=min_silence_ms, silence_thresh=audio.dBFS - 16, seek_step=10)
+            if pauses:
+                pause_start, pause_end = pauses[-1]
+                cut, clean = search_from + (pause_start + pause_end) // 2, True
+        cuts.append((cut, clean))
+        position = cut
+
+    chunks = []
+    edges = [(0, True)] + cuts + [(duration, True)]
+    for index, ((own_start, clean_start), (own_end, clean_end)) in enumerate(zip(edges, edges[1:])):
+        pad_start = 0 if clean_start else overlap_ms // 2
+        pad_end = 0 if clean_end else overlap_ms // 2
+        chunks.append({
+            "index": index,
+            "start": max(0, own_start - pad_start),
+            "end": min(duration, own_end + pad_end),
+            "own_start": own_start,
+            "own_end": own_end,
+        })
+    return chunks
+
+
+def _transcribe_chunk(client: Groq, chunk: dict, chunk_path: str, options: dict) -> dict:
+    response = _response_dict(_create_transcription(
+        client,
+        file_path=chunk_path,
+        url=None,
+        response_format="verbose_json",
+        timestamp_granularities=["segment"],
+        **options,
+    ))
+    offset = chunk["start"] / 1000.0
+    own_start, own_end = chunk["own_start"] / 1000.0, chunk["own_end"] / 1000.0
+    segments = []
+    for seg in analyze_verbose_segments(response):
+        start = (seg["start"] or 0.0) + offset
+        end = (seg["end"] or 0.0) + offset
+        # Overlapping audio is transcribed twice; keep a segment only in the chunk that owns its midpoint.
+        if not own_start <= (start + end) / 2 < own_end:
+            continue
+        segments.append(dict(seg, start=round(start, 3), end=round(end, 3)))
+    if segments:
+        text = " ".join((seg["text"] or "").strip() for seg in segments).strip()
+    else:
+        text = (response.get("text") or "").strip()
+    return {
+        "index": chunk["index"],
+        "start": own_start,
+        "end": own_end,
+        "text": text,
+        "segments": segments,
+        "language": response.get("language"),
+    }
+
+
+def iter_transcribe_chunked(
+    file_path: str,
+    *,
+    model: str = "whisper-large-v3-turbo",
+    language: Optional[str] = None,
+    prompt: Optional[str] = None,
+    temperature: float = 0.0,
+    api_key: Optional[str] = None,
+    chunk_ms: int = STT_CHUNK_MS,
+    overlap_ms: int = STT_CHUNK_OVERLAP_MS,
+    split: str = "silence",
+    max_workers: int = STT_CHUNK_WORKERS,
+    ordered: bool = True,
+) -> Iterator[dict]:
+    """Transcribe a long recording as parallel chunks, yielding each chunk's result.
+
+    The input is normalised with :func:`preprocess_audio` (16 kHz mono FLAC),
+    split with :func:`plan_chunks` and uploaded on a pool of ``max_workers``
+    threads. Yields dicts with ``index``, ``start``/``end`` (seconds), ``text``
+    and ``segments`` whose timestamps are relative to the whole recording.
+    With ``ordered=True`` chunks are yielded in order as soon as every earlier
+    chunk has finished; otherwise in completion order.
+    """
+    from pydub import AudioSegment
+
+    client = groq_client(api_key)
+    options = {"model": model, "language": language, "prompt": prompt, "temperature": temperature}
+    with tempfile.TemporaryDirectory(prefix="ai_doctor_chunks_") as workdir:
+        normalized = preprocess_audio(file_path, os.path.join(workdir, "normalized.flac"))
+        audio = AudioSegment.from_file(normalized)
+        chunks = plan_chunks(audio, chunk_ms=chunk_ms, overlap_ms=overlap_ms, split=split)
+        logger.info(f"Transcribing {len(audio) / 1000:.1f}s of audio in {len(chunks)} chunk(s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="stt-chunk") as pool:
+            futures = []
+            for chunk in chunks:
+                chunk_path = os.path.join(workdir, f"chunk_{chunk['index']:04d}.flac")
+                audio[chunk["start"]:chunk["end"]].export(chunk_path, format="flac")
+                futures.append(pool.submit(_transcribe_chunk, client, chunk, chunk_path, options))
+            try:
+                for future in (futures if ordered else as_completed(futures)):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+def groq_transcribe_chunked(file_path: str, **kwargs) -> tuple[str, str]:
+    """Chunked counterpart of :func:`groq_transcribe` for long recordings.
+
+    Accepts the keyword arguments of :func:`iter_transcribe_chunked` and returns
+    ``(text, detected_language_code)`` for the stitched transcript.
+    """
+    kwargs["ordered"] = True
+    results = list(iter_transcribe_chunked(file_path, **kwargs))
+    text = " ".join(r["text"] for r in results if r["text"]).strip()
+    reported = [normalize_language(r["language"]) for r in results if normalize_language(r["language"])]
+    provider_language = kwargs.get("language") or (max(set(reported), key=reported.count) if reported else None)
+    return text, detect_language(text, provider_language=provider_language)
+
 __all__ = [
     "record_audio",
     "transcribe_with_groq",
     "groq_transcribe",
+    "groq_transcribe_async",
+    "TranscriptionCache",
+    "transcription_cache",
+    "transcription_cache_stats",
     "groq_translate",
     "preprocess_audio",
+    "speech_frames",
+    "vad_trim",
+    "vad_trim_file",
+    "plan_chunks",
+    "iter_transcribe_chunked",
+    "groq_transcribe_chunked",
     "analyze_verbose_segments",
 ]
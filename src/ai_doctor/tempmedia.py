@@ -0,0 +1,232 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from . import metrics
+
+# Default lifetime of a tracked temp file and the total bytes all tracked files may use.
+MEDIA_TEMP_TTL = float(os.environ.get("MEDIA_TEMP_TTL", 300))
+MEDIA_TEMP_MAX_BYTES = int(os.environ.get("MEDIA_TEMP_MAX_BYTES", 1024 * 1024 * 1024))
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_quietly(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+class TempMediaManager:
+    """Deletes temporary media files from one background thread.
+
+    Files are tracked in a heap ordered by expiry, so a single janitor thread
+    sleeps until the next deadline instead of one timer thread per file.
+    Managed directories are scanned when the janitor starts (and every
+    ``scan_interval`` afterwards): files left behind by a previous process are
+    deleted if already past ``max_age`` and adopted otherwise. When tracked
+    files exceed ``max_bytes`` the ones closest to expiry are deleted first.
+    Extra periodic jobs (e.g. cache sweeps) can be registered as sweepers.
+    """
+
+    def __init__(self, default_ttl: float = MEDIA_TEMP_TTL, max_bytes: int = MEDIA_TEMP_MAX_BYTES):
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._heap: list[tuple[float, int, str]] = []
+        self._tracked: dict[str, tuple[float, int]] = {}
+        self._bytes = 0
+        self._seq = itertools.count()
+        self._dirs: dict[str, tuple[float, float]] = {}
+        self._sweepers: list[list] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._stats = {"tracked": 0, "expired": 0, "capped": 0, "orphans": 0, "sweeps": 0}
+
+    def track(self, path, ttl: float | None = None) -> str:
+        """Delete ``path`` after ``ttl`` seconds (``default_ttl`` if omitted)."""
+        path = os.fspath(path)
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._cond:
+            self._add(path, time.time() + ttl, size)
+            self._stats["tracked"] += 1
+            doomed = self._over_cap()
+            self._cond.notify()
+        self._delete(doomed, "capped")
+        self.start()
+        return path
+
+    def discard(self, path) -> bool:
+        """Stop tracking ``path`` and delete it now; returns whether a file was removed."""
+        path = os.fspath(path)
+        with self._cond:
+            entry = self._tracked.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+        return _remove_quietly(path)
+
+    def register_dir(self, directory, max_age: float | None = None, scan_interval: float | None = None):
+        """Manage every file in ``directory``: untracked files expire ``max_age`` after their mtime."""
+        max_age = self.default_ttl if max_age is None else max_age
+        with self._cond:
+            self._dirs[os.fspath(directory)] = (max_age, scan_interval or max_age)
+            self._cond.notify()
+
+    def register_sweeper(self, fn: Callable[[], int], interval: float):
+        """Run ``fn()`` on the janitor thread every ``interval`` seconds; it returns files removed."""
+        with self._cond:
+            self._sweepers.append([fn, interval, time.time() + interval])
+            self._cond.notify()
+
+    def start(self):
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="temp-media-janitor")
+                    self._thread.start()
+
+    def stop(self, timeout: float | None = 5):
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+
+    def scan(self) -> int:
+        """Adopt or delete untracked files in the managed directories; returns files deleted."""
+        now = time.time()
+        with self._cond:
+            dirs = list(self._dirs.items())
+        orphans = []
+        for directory, (max_age, _) in dirs:
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                expires_at = st.st_mtime + max_age
+                with self._cond:
+                    if entry.path in self._tracked:
+                        continue
+                    if expires_at <= now:
+                        orphans.append(entry.path)
+                    else:
+                        self._add(entry.path, expires_at, st.st_size)
+        with self._cond:
+            doomed = self._over_cap()
+        return self._delete(orphans, "orphans") + self._delete(doomed, "capped")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, pending=len(self._tracked), bytes=self._bytes)
+
+    # Callers hold self._cond for the helpers below (except _delete).
+
+    def _add(self, path: str, expires_at: float, size: int):
+        old = self._tracked.get(path)
+        if old is not None:
+            self._bytes -= old[1]
+        self._tracked[path] = (expires_at, size)
+        self._bytes += size
+        heapq.heappush(self._heap, (expires_at, next(self._seq), path))
+
+    def _pop_live(self) -> str | None:
+        """Pop the soonest heap entry that still matches ``_tracked`` (stale ones are skipped)."""
+        while self._heap:
+            expires_at, _, path = heapq.heappop(self._heap)
+            entry = self._tracked.get(path)
+            if entry is not None and entry[0] == expires_at:
+                del self._tracked[path]
+                self._bytes -= entry[1]
+                return path
+        return None
+
+    def _over_cap(self) -> list[str]:
+        doomed = []
+        while self._bytes > self.max_bytes:
+            path = self._pop_live()
+            if path is None:
+                break
+            doomed.append(path)
+        return doomed
+
+    def _due(self, now: float) -> list[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, _, path = self._heap[0]
+            entry = self._tracked.get(path)
+            if entry is None or entry[0] != expires_at:
+                heapq.heappop(self._heap)
+                continue
+            due.append(self._pop_live())
+        return due
+
+    def _delete(self, paths: list[str], reason: str) -> int:
+        removed = sum(1 for path in paths if _remove_quietly(path))
+        if paths:
+            with self._cond:
+                self._stats[reason] += len(paths)
+        return removed
+
+    def _run(self):
+        next_scan: dict[str, float] = {}
+        while True:
+            now = time.time()
+            with self._cond:
+                if self._stopping:
+                    return
+                expired = self._due(now)
+                dirs_due = [d for d in self._dirs if next_scan.get(d, 0) <= now]
+                sweepers_due = [s for s in self._sweepers if s[2] <= now]
+            removed = self._delete(expired, "expired")
+            if dirs_due:
+                try:
+                    removed += self.scan()
+                except Exception as e:
+                    logger.warning(f"Temp media scan failed: {e}")
+                with self._cond:
+                    for d in self._dirs:
+                        next_scan[d] = now + self._dirs[d][1]
+            for sweeper in sweepers_due:
+                fn, interval, _ = sweeper
+                sweeper[2] = now + interval
+                try:
+                    removed += fn() or 0
+                    with self._cond:
+                        self._stats["sweeps"] += 1
+                except Exception as e:
+                    logger.warning(f"Temp media sweeper {getattr(fn, '__qualname__', fn)} failed: {e}")
+            if removed:
+                logger.info(f"Temp media janitor removed {removed} file(s)")
+            with self._cond:
+                if self._stopping:
+                    return
+                deadlines = [s[2] for s in self._sweepers] + list(next_scan.values())
+                if self._heap:
+                    deadlines.append(self._heap[0][0])
+                if len(next_scan) < len(self._dirs):
+                    deadlines.append(now)
+                wait = max(0.0, min(deadlines) - time.time()) if deadlines else None
+                self._cond.wait(wait)
+
+
+temp_media = TempMediaManager()
+metrics.register_stats("temp_media", temp_media.stats)
+
+__all__ = ["TempMediaManager", "temp_media", "MEDIA_TEMP_TTL", "MEDIA_TEMP_MAX_BYTES"]
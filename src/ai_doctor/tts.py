@@ -1,19 +1,65 @@
+import hashlib
+import logging
 import os
+import re
+import time
+import uuid
 from gtts import gTTS
 from pathlib import Path
+from . import metrics
+from .cache import LRUCache
+from .clients import openai_client
+from .tempmedia import temp_media
 try:
     from openai import OpenAI
 except ImportError:
     OpenAI = None
 
+# Streaming TTS: sentences shorter than this are merged with the next one.
+TTS_MIN_SENTENCE_CHARS = int(os.environ.get("TTS_MIN_SENTENCE_CHARS", 40))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# A period after these does not end a sentence.
+_ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "prof", "st", "vs", "e.g", "i.e", "approx", "fig"}
+
+
+def _is_initial(word: str) -> bool:
+    return len(word) == 2 and word[0].isupper() and word[1] == "."
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    """True if the final period belongs to an abbreviation, or to an initial that follows a title or another initial.
+
+    A lone capital after an ordinary word ("vitamin C.") ends the sentence.
+    """
+    words = text.split()
+    if not words or not words[-1].endswith("."):
+        return False
+    if words[-1].rstrip(".").lower() in _ABBREVIATIONS:
+        return True
+    return _is_initial(words[-1]) and len(words) > 1 and (_is_initial(words[-2]) or words[-2].rstrip(".").lower() in _ABBREVIATIONS)
+
+# Every synthesis gets its own file under TTS_OUTPUT_DIR; finished files are
+# moved into a content-addressed cache so repeated text is never re-synthesized.
+TTS_OUTPUT_DIR = os.environ.get("TTS_OUTPUT_DIR", os.path.join("outputs", "requests"))
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join("outputs", "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+TTS_CACHE_TTL = float(os.environ.get("TTS_CACHE_TTL", 7 * 24 * 3600))
+TTS_OUTPUT_TTL = float(os.environ.get("TTS_OUTPUT_TTL", 3600))
+TTS_JANITOR_INTERVAL = float(os.environ.get("TTS_JANITOR_INTERVAL", 300))
+OPENAI_TTS_MODEL = "gpt-4o-mini-tts"
+# Without a TTL, files the index doesn't know are deleted once they are this old.
+_ORPHAN_MIN_AGE = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
 def text_to_speech_with_gtts(input_text: str, output_filepath: str, lang: str = "en") -> str:
     out_path = Path(output_filepath)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    audioobj = gTTS(text=input_text, lang=lang if lang else "en", slow=False)
-    try:
+    with metrics.timed("tts_gtts"):
+        audioobj = gTTS(text=input_text, lang=lang if lang else "en", slow=False)
         audioobj.save(str(out_path))
-    except Exception:
-        raise
+    metrics.payload("tts_audio", out_path.stat().st_size)
     return str(out_path)
 
 def text_to_speech_with_openai(
@@ -23,21 +69,188 @@ def text_to_speech_with_openai(
     instructions: str | None = None,
     lang: str | None = None,
 ) -> str:
+    return _synthesize(input_text, output_filepath, voice=voice, instructions=instructions, lang=lang)[0]
+
+
+def _synthesize(
+    input_text: str,
+    output_filepath: str,
+    voice: str = "alloy",
+    instructions: str | None = None,
+    lang: str | None = None,
+) -> tuple[str, str]:
+    """OpenAI TTS with gTTS fallback; returns (path, model that produced the audio)."""
     api_key = os.environ.get("OPENAI_API_KEY")
     if OpenAI is None or not api_key:
         # Fallback to gTTS and try to use the detected language
-        return text_to_speech_with_gtts(input_text, output_filepath, lang=(lang or "en"))
-    client = OpenAI(api_key=api_key)
+        metrics.fallback("openai_tts_to_gtts", "unconfigured")
+        return text_to_speech_with_gtts(input_text, output_filepath, lang=(lang or "en")), "gtts"
+    client = openai_client(api_key)
     out_path = Path(output_filepath)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     try:
-        with client.audio.speech.with_streaming_response.create(
-            model="gpt-4o-mini-tts",
+        # Only send instructions when set; older SDKs reject the keyword outright.
+        extra = {"instructions": instructions} if instructions else {}
+        with metrics.timed("tts_openai", model=OPENAI_TTS_MODEL), client.audio.speech.with_streaming_response.create(
+            model=OPENAI_TTS_MODEL,
             voice=voice,
             input=input_text,
-            instructions=instructions,
+            **extra,
         ) as response:
             response.stream_to_file(out_path)
-        return output_filepath
-    except Exception:
-        return text_to_speech_with_gtts(input_text, output_filepath, lang=(lang or "en"))
\ No newline at end of file
+        metrics.payload("tts_audio", out_path.stat().st_size)
+        return output_filepath, OPENAI_TTS_MODEL
+    except Exception as e:
+        logger.warning(f"OpenAI TTS failed, falling back to gTTS: {e}")
+        metrics.fallback("openai_tts_to_gtts", type(e).__name__)
+        return text_to_speech_with_gtts(input_text, output_filepath, lang=(lang or "en")), "gtts"
+
+
+class SentenceBuffer:
+    """Accumulate streamed text and release complete sentences.
+
+    A sentence is complete once its terminator (``.``, ``!`` or ``?``) is
+    followed by whitespace and it does not end in a known abbreviation
+    (``Dr.``, ``e.g.``, the ``J.`` of ``Dr. J. Patel``). Sentences shorter than ``min_chars`` are
+    held back and merged with the next one so TTS is not called for fragments.
+    """
+
+    def __init__(self, min_chars: int = TTS_MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._pending = ""
+
+    def feed(self, delta: str) -> list[str]:
+        self._pending += delta
+        pieces = _SENTENCE_END.split(self._pending)
+        self._pending = pieces.pop()
+        sentences, current = [], ""
+        for piece in pieces:
+            current = f"{current} {piece.strip()}" if current else piece.strip()
+            if len(current) >= self.min_chars and not _ends_with_abbreviation(current):
+                sentences.append(current)
+                current = ""
+        if current:
+            self._pending = f"{current} {self._pending}"
+        return sentences
+
+    def flush(self) -> list[str]:
+        rest, self._pending = self._pending.strip(), ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str, min_chars: int = TTS_MIN_SENTENCE_CHARS) -> list[str]:
+    buffer = SentenceBuffer(min_chars)
+    return buffer.feed(text) + buffer.flush()
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TTSCache:
+    """Content-addressed store of synthesized audio with LRU/size eviction.
+
+    Files live in ``directory`` named by the hash of (text, voice, model, lang,
+    instructions). The index is an :class:`LRUCache` bounded by ``max_bytes``
+    of audio and ``ttl`` seconds; evicted entries delete their file. Files
+    already on disk are re-indexed (oldest first) when the cache is created.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES, ttl: float = TTS_CACHE_TTL):
+        self.directory = directory
+        self.enabled = max_bytes > 0
+        self._index = LRUCache(
+            max_entries=1_000_000,
+            ttl=ttl,
+            max_bytes=max_bytes,
+            sizeof=lambda path: os.path.getsize(path) if os.path.exists(path) else 0,
+            on_evict=lambda key, path: _remove_quietly(path),
+        )
+        if self.enabled and os.path.isdir(directory):
+            existing = [e for e in os.scandir(directory) if e.is_file() and e.name.endswith(".mp3")]
+            for entry in sorted(existing, key=lambda e: e.stat().st_mtime):
+                self._index.set(entry.name[:-4], entry.path)
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, lang: str | None, instructions: str | None = None) -> str:
+        raw = "\x1f".join([text, voice, model, lang or "", instructions or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self._index.get(key)
+        if path is not None and not os.path.exists(path):
+            self._index.pop(key)
+            return None
+        return path
+
+    def put(self, key: str, source_path: str) -> str:
+        """Move a freshly synthesized file into the cache and return its cached path."""
+        if not self.enabled or os.path.getsize(source_path) > self._index.max_bytes:
+            return source_path
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        cached_path = os.path.join(self.directory, f"{key}.mp3")
+        os.replace(source_path, cached_path)
+        self._index.set(key, cached_path)
+        return cached_path
+
+    def sweep(self) -> int:
+        """Expire stale entries and delete unindexed cache files older than the TTL.
+
+        Younger unknown files are left alone: they may be a :meth:`put` between
+        its move and its index update, or belong to another process sharing the directory.
+        """
+        removed = self._index.expire()
+        if os.path.isdir(self.directory):
+            known = set(self._index.keys())
+            cutoff = time.time() - (self._index.ttl or _ORPHAN_MIN_AGE)
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name[:-4] not in known and entry.stat().st_mtime < cutoff:
+                    _remove_quietly(entry.path)
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return self._index.stats()
+
+
+tts_cache = TTSCache()
+metrics.register_stats("tts_cache", tts_cache.stats, cache=True)
+
+# Stale per-request outputs and expired cache entries are removed by the shared
+# temp-media janitor rather than a thread of our own.
+temp_media.register_dir(TTS_OUTPUT_DIR, max_age=TTS_OUTPUT_TTL, scan_interval=TTS_JANITOR_INTERVAL)
+temp_media.register_sweeper(tts_cache.sweep, TTS_JANITOR_INTERVAL)
+
+
+def _tts_model() -> str:
+    return OPENAI_TTS_MODEL if OpenAI is not None and os.environ.get("OPENAI_API_KEY") else "gtts"
+
+
+def synthesize_cached(
+    input_text: str,
+    voice: str = "alloy",
+    instructions: str | None = None,
+    lang: str | None = "en",
+) -> str:
+    """Speak ``input_text`` via :func:`text_to_speech_with_openai`, reusing cached audio.
+
+    Returns a path that is unique to this request on a miss (then moved into
+    the cache) and the shared cached file on a hit, so concurrent requests
+    never overwrite each other's output. Audio is stored under the model that
+    actually produced it: gTTS output from an OpenAI outage is never served
+    as an OpenAI hit, and the next request retries OpenAI.
+    """
+    temp_media.start()
+    model = _tts_model()
+    key = TTSCache.key(input_text, voice, model, lang, instructions)
+    cached = tts_cache.get(key)
+    if cached is not None:
+        return cached
+    out_path = os.path.join(TTS_OUTPUT_DIR, f"{uuid.uuid4().hex}.mp3")
+    path, produced_by = _synthesize(input_text, out_path, voice=voice, instructions=instructions, lang=lang)
+    if produced_by != model:
+        key = TTSCache.key(input_text, voice, produced_by, lang, instructions)
+    return tts_cache.put(key, path)
\ No newline at end of file
@@ -1,60 +1,188 @@
 import os
 import gradio as gr
-from .prompts import SYSTEM_PROMPT
-from .vision import encode_image, analyze_image_with_query, analyze_text_query
-from .tts import text_to_speech_with_openai
-from .stt import groq_transcribe
-from .db import init_db, create_session, save_message
+from .context import build_context
+from .vision import encode_image_data_url, stream_image_with_query, stream_text_query
+from .tts import synthesize_cached, SentenceBuffer
+from .stt import groq_transcribe, vad_trim_file, STT_VAD
+from .db import ensure_schema, log_messages, new_session_id
+from .tempmedia import temp_media
+from . import metrics
+from .profiling import profile_handler
+from .language import warm_language_detector
 
 from typing import Optional, Tuple
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
 import shutil
 import threading
+import time
 import uuid
 import base64
 import tempfile
 
+logger = logging.getLogger(__name__)
 
-def process_inputs(image_filepath, patient_text):
+# Copies of uploaded/recorded clips; deleted by the temp-media janitor after MEDIA_TEMP_TTL.
+TEMP_DIR = Path(tempfile.gettempdir()) / "ai_doctor_temp"
+temp_media.register_dir(TEMP_DIR)
+
+
+def _doctor_response_stream(image_filepath, patient_text, session_uuid=None):
+    """Stream the doctor's reply; SYSTEM_PROMPT and the session's earlier turns go in as context."""
     patient_text = patient_text or ""
     if image_filepath:
-        doctor_query = SYSTEM_PROMPT + patient_text
-        doctor_response = analyze_image_with_query(
-            query=doctor_query,
-            encoded_image=encode_image(image_filepath),
+        return stream_image_with_query(
+            query=patient_text.strip() or "What's in this image?",
+            encoded_image=encode_image_data_url(image_filepath),
             model="meta-llama/llama-4-scout-17b-16e-instruct",
+            history=build_context(session_uuid, patient_text),
         )
-    elif patient_text.strip():
-        doctor_query = SYSTEM_PROMPT + patient_text
-        doctor_response = analyze_text_query(query=doctor_query)
-    else:
-        doctor_response = "No input provided. Please provide an image or chat text."
-
-    tts_out_path = os.path.join("outputs", "final.mp3")
-    voice_of_doctor = text_to_speech_with_openai(
-        input_text=doctor_response,
-        output_filepath=tts_out_path,
-        lang="en",
-    )
+    if patient_text.strip():
+        return stream_text_query(query=patient_text, history=build_context(session_uuid, patient_text))
+    return iter(["No input provided. Please provide an image or chat text."])
+
+
+def _doctor_response(image_filepath, patient_text, session_uuid=None) -> str:
+    return "".join(_doctor_response_stream(image_filepath, patient_text, session_uuid))
+
+
+def _speak(doctor_response: str) -> str:
+    # Unique file per request (or a shared cached one), never a fixed outputs/final.mp3.
+    return synthesize_cached(input_text=doctor_response, lang="en")
+
+
+@contextmanager
+def timed(stage: str, timings: dict):
+    """Record the wall time of a block under ``timings[stage]`` (seconds)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def _format_timings(timings: dict) -> str:
+    return " ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in timings.items())
+
+
+# Concurrent Gradio workers; safe now that every request gets its own audio files.
+UI_CONCURRENCY = int(os.environ.get("UI_CONCURRENCY", 8))
+
+# TTS runs beside the UI update; DB logging is strictly serialised on its own thread.
+_tts_pool = ThreadPoolExecutor(max_workers=UI_CONCURRENCY * 2, thread_name_prefix="tts")
+_db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+
+def process_inputs(image_filepath, patient_text):
+    doctor_response = _doctor_response(image_filepath, patient_text)
+    voice_of_doctor = _speak(doctor_response)
     return doctor_response, voice_of_doctor
 
-def process_and_log(image_filepath, patient_text, session_uuid):
-    doctor_response, voice_path = process_inputs(image_filepath, patient_text)
+
+def _log_turn(session_uuid, patient_text, image_filepath, doctor_response):
+    timings = {}
     try:
+        messages = []
         if patient_text and patient_text.strip():
-            save_message(session_uuid, "patient", patient_text, image_filepath)
+            messages.append((session_uuid, "patient", patient_text, image_filepath))
         if doctor_response:
-            save_message(session_uuid, "doctor", doctor_response, None)
+            messages.append((session_uuid, "doctor", doctor_response, None))
+        with timed("db", timings):
+            ensure_schema()
+            # Session row (first turn only) and both messages in one transaction,
+            # or queued for the write-behind batcher.
+            log_messages(messages)
+        logger.info(f"session {session_uuid} logged: {_format_timings(timings)}")
+    except Exception as e:
+        # Non-fatal; the turn has already been shown to the user
+        logger.warning(f"DB logging failed: {e}")
+
+
+def process_and_log(image_filepath, patient_text, session_uuid):
+    """Pipelined submit handler.
+
+    Streams the doctor's text token by token. Every completed sentence is
+    sent to TTS right away, and its audio is yielded in order as soon as it
+    is ready, so playback starts after the first sentence. The DB writes go
+    to a background writer and never delay the response.
+
+    ``session_uuid`` is this browser's ``gr.State``; on the first turn it is
+    None, a new id is generated locally and returned so later turns reuse it.
+    """
+    first_turn = session_uuid is None
+    if first_turn:
+        session_uuid = new_session_id()
+    timings = {}
+    turn_start = time.perf_counter()
+    sentences = SentenceBuffer()
+    pending = deque()
+    # One trace per turn. The span is made current only around each step (and
+    # inside the TTS/DB jobs), since Gradio may resume this generator on another thread.
+    turn_span = metrics.start_span("process_and_log", session_uuid=session_uuid, first_turn=first_turn, image=bool(image_filepath))
+    error = None
+
+    def speak_sentences(batch):
+        for sentence in batch:
+            pending.append(_tts_pool.submit(metrics.in_span(turn_span, _speak), sentence))
+
+    def next_audio(block: bool):
+        if not pending or not (block or pending[0].done()):
+            return None
+        try:
+            chunk = pending.popleft().result()
+        except Exception as e:
+            # One sentence without audio; the text keeps streaming and the turn is still logged.
+            logger.warning(f"TTS failed for a sentence, skipping its audio: {e}")
+            metrics.STAGE_ERRORS.inc(stage="tts_sentence")
+            return None
+        timings.setdefault("first_audio", time.perf_counter() - turn_start)
+        return chunk
+
+    parts = []
+    logged = False
+    try:
+        with timed("llm", timings):
+            # A brand-new session has no history, so skip the lookup entirely.
+            history_session = None if first_turn else session_uuid
+            with metrics.use_span(turn_span):
+                stream = _doctor_response_stream(image_filepath, patient_text, history_session)
+            for delta in metrics.iter_in_span(turn_span, stream):
+                if not parts:
+                    timings["ttft"] = time.perf_counter() - turn_start
+                parts.append(delta)
+                speak_sentences(sentences.feed(delta))
+                yield "".join(parts), next_audio(block=False), session_uuid
+        doctor_response = "".join(parts)
+        speak_sentences(sentences.flush())
+        _db_writer.submit(metrics.in_span(turn_span, _log_turn), session_uuid, patient_text, image_filepath, doctor_response)
+        logged = True
+
+        with timed("tts_tail", timings):
+            while pending:
+                yield doctor_response, next_audio(block=True), session_uuid
+        timings["total"] = time.perf_counter() - turn_start
+        logger.info(f"turn timings: {_format_timings(timings)}")
+        for stage, seconds in timings.items():
+            metrics.observe(f"turn_{stage}", seconds)
     except Exception as e:
-        # Non-fatal; log to console
-        print(f"DB logging failed: {e}")
-    return doctor_response, voice_path
+        error = e
+        metrics.STAGE_ERRORS.inc(stage="turn")
+        raise
+    finally:
+        if not logged:
+            # The LLM stream failed or the client left mid-reply: keep whatever was said.
+            _db_writer.submit(metrics.in_span(turn_span, _log_turn), session_uuid, patient_text, image_filepath, "".join(parts))
+        metrics.end_span(turn_span, error)
 
 
-def ui_transcribe_audio(audio_file: Optional[str], file_obj: Optional[str]) -> Tuple[str, str, Optional[str]]:
+def ui_transcribe_audio(audio_file: Optional[str], file_obj: Optional[str], vad: Optional[bool] = None) -> Tuple[str, str, Optional[str]]:
     """Transcribe an uploaded or recorded audio clip and return (text, language).
 
     `audio_file` is a Gradio-uploaded path, `file_obj` is an alternative file path.
+    `vad` trims silences before upload (defaults to the STT_VAD env flag).
     """
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
@@ -66,21 +194,8 @@ def ui_transcribe_audio(audio_file: Optional[str], file_obj: Optional[str]) -> T
         return ("", "No audio provided", None)
 
     # Prepare temp directory for copying/storing incoming audio
-    TEMP_DIR = Path(tempfile.gettempdir()) / "ai_doctor_temp"
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
-    def schedule_delete(p: Path, delay: int = 300):
-        def _del():
-            try:
-                if p.exists():
-                    p.unlink()
-            except Exception:
-                pass
-
-        t = threading.Timer(delay, _del)
-        t.daemon = True
-        t.start()
-
     # Normalize common Gradio return formats to a filesystem path and copy into temp dir
     dest_path = None
     try:
@@ -128,32 +243,51 @@ def ui_transcribe_audio(audio_file: Optional[str], file_obj: Optional[str]) -> T
     except Exception as e:
         return ("", f"Failed to normalize audio input: {e}", None)
 
-    # If dest_path is a Path, schedule its deletion after a delay and use path for transcription
+    # If dest_path is a Path, hand it to the temp-media janitor and use path for transcription
     preview_path = None
     transcribe_path = None
     if isinstance(dest_path, Path):
         preview_path = str(dest_path)
         transcribe_path = str(dest_path)
-        schedule_delete(dest_path, delay=300)
+        temp_media.track(dest_path)
     else:
         # dest_path might be a URL string
         transcribe_path = dest_path
         preview_path = None
 
+    vad_note = ""
+    if (STT_VAD if vad is None else vad) and isinstance(dest_path, Path):
+        trimmed_path = TEMP_DIR / f"{dest_path.stem}_vad.flac"
+        try:
+            report = vad_trim_file(str(dest_path), str(trimmed_path))
+            temp_media.track(trimmed_path)
+            transcribe_path = str(trimmed_path)
+            vad_note = f" (trimmed {report['removed_ms'] / 1000:.1f}s of silence, {report['removed_ratio']:.0%})"
+        except Exception as e:
+            vad_note = f" (silence trimming skipped: {e})"
+
     try:
         text, lang = groq_transcribe(file_path=transcribe_path if isinstance(transcribe_path, str) else None, url=(transcribe_path if (isinstance(transcribe_path, str) and transcribe_path.startswith('http')) else None), model="whisper-large-v3-turbo", api_key=api_key, response_format="json")
-        return (text or "", lang or "", preview_path)
+        return (text or "", (lang or "") + vad_note, preview_path)
     except Exception as e:
         return ("", f"Transcription failed: {e}", preview_path)
 
 
-def create_app():
-    # Initialize DB & session
+def _warm_schema():
     try:
-        init_db()
+        ensure_schema()
     except Exception as e:
-        print(f"Database init error: {e}")
-    session_uuid = create_session()
+        logger.warning(f"Database init error: {e}")
+
+
+def create_app():
+    # Schema setup runs on the DB writer thread, ahead of any turn it will log,
+    # so building the app never waits on MySQL. Sessions are created per browser.
+    _db_writer.submit(_warm_schema)
+    # Load langdetect's profiles off the request path (transcripts fall back to it).
+    threading.Thread(target=warm_language_detector, daemon=True, name="langdetect-warm").start()
+    # Sweeps clips and TTS files left over from a previous run, then keeps running.
+    temp_media.start()
     with gr.Blocks() as demo:
         gr.Markdown("# AI Doctor (Vision + Text)")
         with gr.Row():
@@ -164,25 +298,27 @@ def create_app():
                 with gr.Accordion("Speech Input (record or upload)", open=False):
                     audio_rec = gr.Audio(sources=["microphone"], type="filepath", label="Record or upload audio")
                     audio_file = gr.File(label="Upload audio file (optional)")
+                    vad_toggle = gr.Checkbox(label="Trim silence before transcribing", value=STT_VAD)
                     transcribe_btn = gr.Button("Transcribe Audio")
                     detected_lang = gr.Textbox(label="Detected Language / Status", interactive=False)
                     audio_preview = gr.Audio(label="Preview Audio", interactive=False)
                 submit_btn = gr.Button("Submit", variant="primary")
             with gr.Column():
                 doctor_out = gr.Textbox(label="Doctor's Response", lines=10)
-                audio_out = gr.Audio(label="Doctor Voice", visible=True)
-                session_state = gr.State(session_uuid)
+                audio_out = gr.Audio(label="Doctor Voice", visible=True, streaming=True, autoplay=True)
+                session_state = gr.State(None)
 
         # Wire transcription button: populate patient_text and show language/status
         transcribe_btn.click(
-            fn=ui_transcribe_audio,
-            inputs=[audio_rec, audio_file],
+            fn=profile_handler(ui_transcribe_audio),
+            inputs=[audio_rec, audio_file, vad_toggle],
             outputs=[patient_text, detected_lang, audio_preview],
         )
 
         submit_btn.click(
-            fn=process_and_log,
+            fn=profile_handler(process_and_log),
             inputs=[image_in, patient_text, session_state],
-            outputs=[doctor_out, audio_out],
+            outputs=[doctor_out, audio_out, session_state],
         )
+    demo.queue(default_concurrency_limit=UI_CONCURRENCY)
     return demo
\ No newline at end of file
@@ -1,6 +1,34 @@
 import base64
+import hashlib
+import json
+import logging
 import os
-from groq import Groq
+import time
+from io import BytesIO
+from typing import Iterator
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import metrics
+from .cache import LRUCache, SingleFlight
+from .clients import groq_client
+
+logger = logging.getLogger(__name__)
+
+# Images are downscaled and re-encoded before being sent to the vision model.
+VISION_MAX_SIDE = int(os.environ.get("VISION_MAX_SIDE", 1280))
+VISION_IMAGE_FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "JPEG").upper()
+VISION_IMAGE_QUALITY = int(os.environ.get("VISION_IMAGE_QUALITY", 85))
+
+# Replies to identical (image, prompt, model, history) requests are reused for
+# VISION_CACHE_TTL seconds, and identical requests already in flight share one
+# upstream call (double-clicked Submit, the same photo uploaded again). 0 disables.
+VISION_CACHE_SIZE = int(os.environ.get("VISION_CACHE_SIZE", 512))
+VISION_CACHE_TTL = float(os.environ.get("VISION_CACHE_TTL", 600))
+# How long a coalesced request waits for the leading call before making its own.
+VISION_COALESCE_WAIT = float(os.environ.get("VISION_COALESCE_WAIT", 120))
+
+_MIME_BY_FORMAT = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png", "GIF": "image/gif"}
 
 
 def _missing_key_message() -> str:
@@ -17,34 +45,274 @@ def encode_image(image_path: str) -> str:
         return base64.b64encode(image_file.read()).decode("utf-8")
 
 
-def analyze_image_with_query(query: str, model: str, encoded_image: str) -> str:
-    key = os.environ.get("GROQ_API_KEY")
-    if not key:
-        return _missing_key_message()
+def sniff_image_mime(data: bytes) -> str:
+    """Guess the MIME type from an image's magic bytes (defaults to JPEG)."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+def prepare_image(
+    image_path: str,
+    max_side: int = VISION_MAX_SIDE,
+    fmt: str = VISION_IMAGE_FORMAT,
+    quality: int = VISION_IMAGE_QUALITY,
+) -> tuple[bytes, str, dict]:
+    """Orient, downscale and re-encode an image for a vision request.
+
+    Applies the EXIF orientation, shrinks the longest side to ``max_side`` and
+    re-encodes as ``fmt`` (JPEG or WEBP) at ``quality``. If the original is
+    already small enough and smaller than the re-encode, it is sent as-is.
+    Returns ``(data, mime_type, report)`` where the report holds before/after
+    byte counts and dimensions.
+    """
+    with open(image_path, "rb") as fh:
+        original = fh.read()
+    report = {"original_bytes": len(original), "encoded_bytes": len(original), "original_size": None, "encoded_size": None, "format": None}
+    try:
+        with Image.open(BytesIO(original)) as img:
+            report["original_size"] = img.size
+            rotated = img.getexif().get(0x0112, 1) != 1
+            img = ImageOps.exif_transpose(img)
+            resized = max(img.size) > max_side
+            if resized:
+                img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            if fmt == "JPEG" and img.mode != "RGB":
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.getchannel("A"))
+            buf = BytesIO()
+            img.save(buf, format=fmt, quality=quality, optimize=True)
+            encoded_size = img.size
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Sending {image_path} unprocessed: {e}")
+        return original, sniff_image_mime(original), report
+
+    data = buf.getvalue()
+    if not resized and not rotated and len(original) <= len(data):
+        data, mime = original, sniff_image_mime(original)
+        report.update(encoded_size=report["original_size"], format="original")
+    else:
+        mime = _MIME_BY_FORMAT.get(fmt, "image/jpeg")
+        report.update(encoded_bytes=len(data), encoded_size=encoded_size, format=fmt)
+    logger.info(f"Prepared {image_path}: {report['original_bytes']} -> {len(data)} bytes ({report['format']})")
+    return data, mime, report
+
 
-    client = Groq(api_key=key)
-    messages = [
+def encode_image_data_url(image_path: str, **kwargs) -> str:
+    """Return a ``data:`` URL of the :func:`prepare_image` output, ready for ``image_url``."""
+    data, mime, _ = prepare_image(image_path, **kwargs)
+    metrics.payload("vision_image", len(data))
+    return f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def _image_url(encoded_image: str) -> str:
+    if encoded_image.startswith("data:"):
+        return encoded_image
+    # Raw base64 from encode_image: label it with the real type instead of assuming JPEG.
+    head = base64.b64decode(encoded_image[:24] + "=" * (-len(encoded_image[:24]) % 4))
+    return f"data:{sniff_image_mime(head)};base64,{encoded_image}"
+
+
+def _image_messages(query: str, encoded_image: str, history: list[dict] | None = None) -> list[dict]:
+    return list(history or []) + [
         {
             "role": "user",
             "content": [
                 {"type": "text", "text": query},
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"},
+                    "image_url": {"url": _image_url(encoded_image)},
                 },
             ],
         }
     ]
-    chat_completion = client.chat.completions.create(messages=messages, model=model)
+
+
+def _text_messages(query: str, history: list[dict] | None = None) -> list[dict]:
+    return list(history or []) + [{"role": "user", "content": [{"type": "text", "text": query}]}]
+
+
+_response_cache = LRUCache(max_entries=max(1, VISION_CACHE_SIZE), ttl=VISION_CACHE_TTL)
+_inflight = SingleFlight()
+RESPONSE_CACHE = metrics.registry.counter(
+    "ai_doctor_llm_response_cache_total",
+    "Vision/text reply lookups: hit (cached), miss (upstream call) or coalesced (shared an in-flight call).",
+    ["result"],
+)
+metrics.register_stats("llm_response_cache", lambda: dict(_response_cache.stats(), in_flight=_inflight.in_flight()))
+
+
+class _Abandoned(Exception):
+    """The leading stream was closed before the reply was complete."""
+
+
+def normalize_prompt(query: str) -> str:
+    return " ".join((query or "").split()).casefold()
+
+
+def response_cache_key(model: str, query: str, encoded_image: str | None = None, history: list[dict] | None = None) -> str:
+    """Hash of the model, normalized prompt, image content and prior messages."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8") + b"\x1f" + normalize_prompt(query).encode("utf-8") + b"\x1f")
+    if encoded_image:
+        # Only the base64 payload: the same bytes labelled differently are the same image.
+        digest.update(hashlib.sha256(encoded_image.rsplit(",", 1)[-1].encode("ascii")).digest())
+    digest.update(b"\x1f" + json.dumps(history or [], sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _follow(call) -> str | None:
+    """Wait for an in-flight identical call; None if its leader gave up midway or took too long."""
+    try:
+        text = _inflight.wait(call, VISION_COALESCE_WAIT)
+    except (_Abandoned, TimeoutError):
+        return None
+    RESPONSE_CACHE.inc(result="coalesced")
+    return text
+
+
+def _cached_complete(cache_key: str, key: str, messages: list[dict], model: str) -> str:
+    if VISION_CACHE_SIZE <= 0:
+        return _complete(key, messages, model)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        RESPONSE_CACHE.inc(result="hit")
+        return cached
+    call, leader = _inflight.join(cache_key)
+    if not leader:
+        text = _follow(call)
+        if text is not None:
+            return text
+        return _complete(key, messages, model)
+    RESPONSE_CACHE.inc(result="miss")
+    try:
+        text = _complete(key, messages, model)
+    except BaseException as e:
+        _inflight.finish(cache_key, call, error=e)
+        raise
+    _response_cache.set(cache_key, text)
+    _inflight.finish(cache_key, call, value=text)
+    return text
+
+
+def _cached_stream(cache_key: str, key: str, messages: list[dict], model: str) -> Iterator[str]:
+    """:func:`_stream_completion` through the reply cache.
+
+    Hits and coalesced followers get the whole reply as one chunk; the leader
+    streams tokens as usual and publishes the joined text when the stream ends.
+    """
+    if VISION_CACHE_SIZE <= 0:
+        yield from _stream_completion(key, messages, model)
+        return
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        RESPONSE_CACHE.inc(result="hit")
+        yield cached
+        return
+    call, leader = _inflight.join(cache_key)
+    if not leader:
+        text = _follow(call)
+        if text is not None:
+            yield text
+        else:
+            yield from _stream_completion(key, messages, model)
+        return
+    RESPONSE_CACHE.inc(result="miss")
+    parts = []
+    error: BaseException = _Abandoned()
+    try:
+        for delta in _stream_completion(key, messages, model):
+            parts.append(delta)
+            yield delta
+        text = "".join(parts)
+        _response_cache.set(cache_key, text)
+        _inflight.finish(cache_key, call, value=text)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if not call.done.is_set():
+            _inflight.finish(cache_key, call, error=error)
+
+
+def _stream_completion(key: str, messages: list[dict], model: str) -> Iterator[str]:
+    client = groq_client(key)
+    start = time.perf_counter()
+    # Not a context-managed span: the generator may be resumed on another thread.
+    span = metrics.start_span("llm", model=model, stream=True)
+    error = None
+    try:
+        stream = client.chat.completions.create(messages=messages, model=model, stream=True)
+        first = True
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first:
+                first = False
+                ttft = time.perf_counter() - start
+                metrics.observe("llm_ttft", ttft)
+                logger.info(f"{model} time to first token: {ttft * 1000:.0f}ms")
+            yield delta
+    except Exception as e:
+        error = e
+        metrics.STAGE_ERRORS.inc(stage="llm")
+        raise
+    finally:
+        metrics.observe("llm", time.perf_counter() - start)
+        metrics.end_span(span, error)
+
+
+def _complete(key: str, messages: list[dict], model: str) -> str:
+    client = groq_client(key)
+    with metrics.timed("llm", model=model, stream=False):
+        chat_completion = client.chat.completions.create(messages=messages, model=model)
     return chat_completion.choices[0].message.content
 
 
-def analyze_text_query(query: str, model: str = "meta-llama/llama-4-scout-17b-16e-instruct") -> str:
+def analyze_image_with_query(query: str, model: str, encoded_image: str, history: list[dict] | None = None) -> str:
+    """Ask ``model`` about an image given as raw base64 or a ``data:`` URL.
+
+    ``history`` is sent ahead of the question: the system prompt and earlier
+    turns as chat messages (see :func:`ai_doctor.context.build_context`).
+    """
     key = os.environ.get("GROQ_API_KEY")
     if not key:
         return _missing_key_message()
 
-    client = Groq(api_key=key)
-    messages = [{"role": "user", "content": [{"type": "text", "text": query}]}]
-    chat_completion = client.chat.completions.create(messages=messages, model=model)
-    return chat_completion.choices[0].message.content
\ No newline at end of file
+    cache_key = response_cache_key(model, query, encoded_image, history)
+    return _cached_complete(cache_key, key, _image_messages(query, encoded_image, history), model)
+
+
+def analyze_text_query(query: str, model: str = "meta-llama/llama-4-scout-17b-16e-instruct", history: list[dict] | None = None) -> str:
+    key = os.environ.get("GROQ_API_KEY")
+    if not key:
+        return _missing_key_message()
+
+    return _cached_complete(response_cache_key(model, query, None, history), key, _text_messages(query, history), model)
+
+
+def stream_image_with_query(query: str, model: str, encoded_image: str, history: list[dict] | None = None) -> Iterator[str]:
+    """Streaming :func:`analyze_image_with_query`: yields response text as tokens arrive."""
+    key = os.environ.get("GROQ_API_KEY")
+    if not key:
+        yield _missing_key_message()
+        return
+    cache_key = response_cache_key(model, query, encoded_image, history)
+    yield from _cached_stream(cache_key, key, _image_messages(query, encoded_image, history), model)
+
+
+def stream_text_query(query: str, model: str = "meta-llama/llama-4-scout-17b-16e-instruct", history: list[dict] | None = None) -> Iterator[str]:
+    """Streaming :func:`analyze_text_query`: yields response text as tokens arrive."""
+    key = os.environ.get("GROQ_API_KEY")
+    if not key:
+        yield _missing_key_message()
+        return
+    yield from _cached_stream(response_cache_key(model, query, None, history), key, _text_messages(query, history), model)
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api
+
+
+def _lines(resp) -> list[dict]:
+    return [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+
+
+def test_batch_streams_ndjson_with_per_item_errors(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    seen_paths = []
+    running = 0
+    peak = 0
+
+    async def fake_transcribe(*, file_path=None, url=None, model=None, language=None, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(0.02)
+            if url and "broken" in url:
+                raise ConnectionError("provider rejected the url")
+            if file_path:
+                seen_paths.append(file_path)
+                with open(file_path, "rb") as fh:
+                    return fh.read().decode(), language or "en"
+            return f"from {url}", "en"
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(api, "groq_transcribe_async", fake_transcribe)
+    files = [("files", (f"clip{i}.wav", f"clip {i}".encode(), "audio/wav")) for i in range(4)]
+    data = {"urls": ["https://example.test/a.mp3", "https://example.test/broken.mp3"], "language": "de", "concurrency": "2"}
+    with TestClient(api.app) as client:
+        resp = client.post("/transcribe/batch", files=files, data=data)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(resp)
+    summary = lines.pop()
+    assert summary["done"] and summary["total"] == 6 and summary["succeeded"] == 5 and summary["failed"] == 1
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == list(range(6))
+    assert by_index[2] == {**by_index[2], "ok": True, "source": "clip2.wav", "text": "clip 2", "language": "de"}
+    assert by_index[4]["text"] == "from https://example.test/a.mp3"
+    assert by_index[5]["ok"] is False and by_index[5]["status"] == 502 and "rejected" in by_index[5]["error"]
+    assert peak <= 2
+    assert seen_paths and not any(os.path.exists(p) for p in seen_paths)
+
+
+def test_batch_rejects_empty_and_oversized_requests(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(api, "BATCH_MAX_ITEMS", 2)
+    with TestClient(api.app) as client:
+        assert client.post("/transcribe/batch", data={"model": "whisper-large-v3-turbo"}).status_code == 400
+        resp = client.post("/transcribe/batch", data={"urls": ["https://a.test/1", "https://a.test/2", "https://a.test/3"]})
+    assert resp.status_code == 400 and "At most 2" in resp.json()["detail"]
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api, db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(db, "_schema_ready", True)
+    with TestClient(api.app) as c:
+        yield c
+
+
+def test_history_page_and_cursor(client, monkeypatch):
+    stamp = datetime(2025, 1, 1, 12, 0)
+    calls = []
+
+    def fake_page(session_uuid, after_id, limit):
+        calls.append((session_uuid, after_id, limit))
+        return [(7, "patient", "Hello", None, stamp)], 7
+
+    monkeypatch.setattr(db, "fetch_messages_page", fake_page)
+    resp = client.get("/sessions/abc/messages", params={"after_id": 3, "limit": 1})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["next_after_id"] == 7
+    assert body["messages"][0] == {"id": 7, "role": "patient", "content": "Hello", "image_path": None, "created_at": stamp.isoformat()}
+    assert calls == [("abc", 3, 1)]
+    assert client.get("/sessions/abc/messages", params={"limit": 0}).status_code == 400
+
+
+def test_add_message_maps_errors(client, monkeypatch):
+    written = []
+    monkeypatch.setattr(db, "save_messages_bulk", lambda rows: written.extend(rows) or len(rows))
+    resp = client.post("/sessions/abc/messages", json={"role": "doctor", "content": "Rest and fluids."})
+    assert resp.status_code == 201 and written == [("abc", "doctor", "Rest and fluids.", None)]
+
+    def unavailable(rows):
+        raise RuntimeError("Failed saving 1 messages: connection refused")
+
+    monkeypatch.setattr(db, "save_messages_bulk", unavailable)
+    assert client.post("/sessions/abc/messages", json={"role": "doctor", "content": "x"}).status_code == 503
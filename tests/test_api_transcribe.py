@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api
+
+
+@pytest.fixture
+def upload_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(api, "UPLOAD_TMP_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_slow_transcription_times_out_with_504(monkeypatch, upload_dir):
+    seen = []
+
+    async def slow_transcribe(*, file_path=None, **kwargs):
+        seen.append(file_path)
+        await asyncio.sleep(5)
+        return "too late", "en"
+
+    monkeypatch.setattr(api, "groq_transcribe_async", slow_transcribe)
+    with TestClient(api.app) as client:
+        resp = client.post("/transcribe", files={"file": ("clip.wav", b"RIFF....", "audio/wav")}, data={"timeout": "0.2"})
+    assert resp.status_code == 504
+    assert "timed out after 0.2s" in resp.json()["detail"]
+    assert seen and not os.path.exists(seen[0])
+    assert not list(upload_dir.iterdir())
+
+
+def test_oversized_upload_is_rejected_with_413(monkeypatch, upload_dir):
+    calls = []
+
+    async def transcribe(**kwargs):
+        calls.append(kwargs)
+        return "", "en"
+
+    monkeypatch.setattr(api, "groq_transcribe_async", transcribe)
+    monkeypatch.setattr(api, "MAX_UPLOAD_BYTES", 4096)
+    monkeypatch.setattr(api, "UPLOAD_CHUNK_BYTES", 1024)
+    with TestClient(api.app) as client:
+        resp = client.post("/transcribe", files={"file": ("big.wav", os.urandom(4097), "audio/wav")})
+        assert resp.status_code == 413
+        assert resp.json()["detail"] == "Upload exceeds 4096 bytes"
+        assert client.post("/transcribe", files={"file": ("ok.wav", os.urandom(4096), "audio/wav")}).status_code == 200
+    # Rejected before transcription, and the partial copy is gone.
+    assert len(calls) == 1
+    assert not list(upload_dir.iterdir())
@@ -0,0 +1,58 @@
+import os
+import shutil
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api
+
+
+@pytest.fixture
+def session_dirs():
+    session_id = f"test-{uuid.uuid4().hex}"
+    yield session_id, api.ensure_session_media_dirs(session_id)
+    shutil.rmtree(api.ensure_session_media_dirs(session_id)["base"], ignore_errors=True)
+
+
+def _all_files(directory):
+    return [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+
+
+def test_oversized_upload_media_is_rejected_with_413(monkeypatch, session_dirs):
+    session_id, dirs = session_dirs
+    monkeypatch.setattr(api, "MAX_UPLOAD_BYTES", 4096)
+    files = [
+        ("files", ("small.jpg", os.urandom(1024), "image/jpeg")),
+        ("files", ("huge.png", os.urandom(4097), "image/png")),
+    ]
+    with TestClient(api.app) as client:
+        resp = client.post("/upload-media", data={"session_id": session_id}, files=files)
+    assert resp.status_code == 413
+    assert "huge.png exceeds 4096 bytes" in resp.json()["detail"]
+    # Nothing from the request was stored, and no partial or temp file was left behind.
+    assert _all_files(dirs["base"]) == []
+
+
+def test_streaming_cap_removes_partial_file(monkeypatch, session_dirs):
+    session_id, dirs = session_dirs
+    monkeypatch.setattr(api, "UPLOAD_CHUNK_BYTES", 1024)
+    # Size unknown up front (e.g. chunked parts): the streaming copy must still stop at the cap.
+    original = api._stream_to_file
+    monkeypatch.setattr(api, "_stream_to_file", lambda upload, path: original(upload, path, max_bytes=2048))
+    with TestClient(api.app) as client:
+        resp = client.post("/upload-media", data={"session_id": session_id}, files=[("files", ("scan.jpg", os.urandom(4096), "image/jpeg"))])
+    assert resp.status_code == 413
+    assert _all_files(dirs["base"]) == []
+
+
+def test_upload_media_stores_files_within_the_cap(monkeypatch, session_dirs):
+    session_id, dirs = session_dirs
+    monkeypatch.setattr(api, "MAX_UPLOAD_BYTES", 4096)
+    payload = os.urandom(4096)
+    with TestClient(api.app) as client:
+        resp = client.post("/upload-media", data={"session_id": session_id}, files=[("files", ("rash.jpg", payload, "image/jpeg"))])
+    assert resp.status_code == 200
+    (entry,) = resp.json()["files"]
+    assert entry["stored"] and entry["bytes"] == 4096
+    assert _all_files(dirs["base"]) == [os.path.join(dirs["images"], "rash.jpg")]
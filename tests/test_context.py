@@ -0,0 +1,57 @@
+from src.ai_doctor import context
+from src.ai_doctor.context import approx_tokens, build_context, fit_history, summarize_turns
+from src.ai_doctor.prompts import SYSTEM_PROMPT
+
+
+def _rows(turns: int, words: int = 30):
+    rows = []
+    for i in range(turns):
+        rows.append((2 * i + 1, "patient", f"Symptom report {i}. " + "detail " * words, None, None))
+        rows.append((2 * i + 2, "doctor", f"Advice {i}. " + "advice " * words, None, None))
+    return rows
+
+
+def test_approx_tokens():
+    assert approx_tokens("") == 0
+    assert approx_tokens("a b c d e") == 5
+    assert approx_tokens("x" * 400) == 100
+
+
+def test_fit_history_keeps_everything_within_budget():
+    rows = _rows(3)
+    history = fit_history(rows, budget=10_000)
+    assert [m["role"] for m in history] == ["user", "assistant"] * 3
+    assert history[0]["content"].startswith("Symptom report 0.")
+
+
+def test_fit_history_summarizes_evicted_turns_and_respects_budget():
+    rows = _rows(20)
+    budget = 600
+    history = fit_history(rows, budget=budget, summary_tokens=120)
+    assert sum(context.message_tokens(m) for m in history) <= budget
+    assert history[0]["role"] == "system"
+    assert "Symptom report" in history[0]["content"]
+    assert history[1]["role"] == "user"
+    assert history[-1]["content"].startswith("Advice 19.")
+
+
+def test_summarize_turns_prefers_recent_patient_messages():
+    summary = summarize_turns(_rows(50), max_tokens=40)
+    assert "Symptom report 49." in summary and "Symptom report 0." not in summary
+
+
+def test_build_context_uses_system_message_and_caches(monkeypatch):
+    calls = []
+
+    def fake_fetch(session_uuid, limit):
+        calls.append(session_uuid)
+        return _rows(2)
+
+    monkeypatch.setattr(context, "fetch_recent_messages", fake_fetch)
+    messages = build_context("sid", "How long will this last?")
+    assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert [m["role"] for m in messages[1:]] == ["user", "assistant"] * 2
+    before = context.context_cache_stats()["hits"]
+    assert build_context("sid", "How long will this last?") == messages
+    assert context.context_cache_stats()["hits"] == before + 1
+    assert build_context(None, "hi") == [messages[0]]
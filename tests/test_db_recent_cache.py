@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+
+import pytest
+
+from src.ai_doctor import db
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+
+    def execute(self, sql, params):
+        if sql.startswith("INSERT INTO messages"):
+            self.table.append((len(self.table) + 1, params[1], params[2], params[3], params[4]))
+
+    def executemany(self, sql, rows):
+        for params in rows:
+            self.execute(sql, params)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    rows = []
+
+    @contextmanager
+    def fake_cursor(commit=False):
+        yield FakeCursor(rows)
+
+    monkeypatch.setattr(db, "_cursor", fake_cursor)
+    db._recent_cache.clear()
+    yield rows
+    db._recent_cache.clear()
+
+
+def test_write_between_fetch_and_fill_is_not_hidden(table, monkeypatch):
+    db.save_message("s1", "patient", "I have a rash.")
+    reads = []
+
+    def racing_fetch(session_uuid, limit):
+        snapshot = list(table)
+        if not reads:
+            # The doctor's reply commits after this read but before the cache fill.
+            db.save_message("s1", "doctor", "Keep it clean.")
+        reads.append(snapshot)
+        return snapshot
+
+    monkeypatch.setattr(db, "_fetch_latest", racing_fetch)
+    assert [r[2] for r in db.fetch_recent_messages("s1")] == ["I have a rash."]
+    # The stale read was not cached: the next call reads again and sees the reply.
+    assert [r[2] for r in db.fetch_recent_messages("s1")] == ["I have a rash.", "Keep it clean."]
+    assert [r[2] for r in db.fetch_recent_messages("s1")] == ["I have a rash.", "Keep it clean."]
+    assert len(reads) == 2
+
+
+def test_writes_invalidate_cached_rows(table, monkeypatch):
+    monkeypatch.setattr(db, "_fetch_latest", lambda session_uuid, limit: list(table))
+    db.save_message("s2", "patient", "Headache.")
+    assert len(db.fetch_recent_messages("s2")) == 1
+    db.save_messages_bulk([("s2", "doctor", "Rest."), ("s2", "patient", "Thanks.")])
+    assert [r[2] for r in db.fetch_recent_messages("s2")] == ["Headache.", "Rest.", "Thanks."]
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+import pytest
+
+from scripts.bench_import import DEFAULT_FORBID, loaded_modules
+
+HEAVY = DEFAULT_FORBID.split(",")
+
+
+@pytest.mark.parametrize("module", ["src.ai_doctor", "src.ai_doctor.api", "src.ai_doctor.stt"])
+def test_import_does_not_load_heavy_dependencies(module):
+    assert loaded_modules(module, HEAVY) == []
+
+
+def test_package_exports_resolve_lazily():
+    code = (
+        "import sys, src.ai_doctor as pkg\n"
+        "assert 'src.ai_doctor.prompts' not in sys.modules\n"
+        "assert pkg.SYSTEM_PROMPT and 'src.ai_doctor.prompts' in sys.modules\n"
+        "assert 'create_app' in dir(pkg)\n"
+        "try:\n"
+        "    pkg.missing\n"
+        "except AttributeError:\n"
+        "    pass\n"
+        "else:\n"
+        "    raise SystemExit('expected AttributeError')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
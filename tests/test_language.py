@@ -0,0 +1,31 @@
+from src.ai_doctor import language
+from src.ai_doctor.language import detect_language, language_stats, normalize_language
+
+
+def test_normalize_provider_language():
+    assert normalize_language("english") == "en"
+    assert normalize_language(" French ") == "fr"
+    assert normalize_language("de") == "de"
+    assert normalize_language("klingon") is None
+    assert normalize_language(None) is None
+
+
+def test_provider_language_skips_detection(monkeypatch):
+    def fail(text):
+        raise AssertionError("langdetect should not run")
+
+    monkeypatch.setattr(language, "_langdetect", fail)
+    assert detect_language("Hola, me duele la cabeza", provider_language="spanish") == "es"
+
+
+def test_short_texts_are_memoized_and_deterministic():
+    text = "Ich habe seit drei Tagen starke Kopfschmerzen und Fieber."
+    first = detect_language(text)
+    hits = language_stats()["memo_hits"]
+    assert detect_language(text) == first == "de"
+    assert language_stats()["memo_hits"] == hits + 1
+
+
+def test_empty_or_undetectable_text_uses_default():
+    assert detect_language("") == "en"
+    assert detect_language("12345 !!!", default="fr") == "fr"
@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api, metrics, tts
+
+
+def test_registry_renders_counters_histograms_and_stats():
+    registry = metrics.Registry()
+    hits = registry.counter("t_hits_total", "Hits.", ["cache"])
+    latency = registry.histogram("t_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    hits.inc(cache="stt")
+    hits.inc(2, cache="stt")
+    latency.observe(0.05, stage="llm")
+    latency.observe(0.5, stage="llm")
+    registry.register_stats("demo", lambda: {"hits": 4, "misses": 1, "entries": 3, "name": "ignored"}, cache=True)
+    registry.register_stats("broken", lambda: 1 / 0)
+
+    text = registry.render()
+    assert "# TYPE t_hits_total counter" in text
+    assert 't_hits_total{cache="stt"} 3' in text
+    assert 't_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="llm",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+    assert 't_seconds_count{stage="llm"} 2' in text
+    assert 'ai_doctor_component_stat{component="demo",stat="entries"} 3' in text
+    assert 'ai_doctor_cache_hits_total{cache="demo"} 4' in text
+    assert "ignored" not in text and "broken" not in text
+    with pytest.raises(ValueError):
+        hits.inc(stage="wrong")
+
+
+def test_timed_counts_errors():
+    before = metrics.STAGE_SECONDS.count(stage="test_stage")
+    with pytest.raises(RuntimeError):
+        with metrics.timed("test_stage"):
+            raise RuntimeError("boom")
+    assert metrics.STAGE_SECONDS.count(stage="test_stage") == before + 1
+    assert metrics.STAGE_ERRORS.value(stage="test_stage") >= 1
+
+
+def test_openai_tts_failure_counts_gtts_fallback(monkeypatch, tmp_path):
+    class FailingClient:
+        class audio:
+            class speech:
+                class with_streaming_response:
+                    @staticmethod
+                    def create(**kwargs):
+                        raise ConnectionError("provider down")
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(tts, "OpenAI", object)
+    monkeypatch.setattr(tts, "openai_client", lambda key: FailingClient)
+    monkeypatch.setattr(tts, "text_to_speech_with_gtts", lambda text, path, lang="en": path)
+    before = metrics.FALLBACKS.value(path="openai_tts_to_gtts", reason="ConnectionError")
+    out = str(tmp_path / "reply.mp3")
+    assert tts.text_to_speech_with_openai("Rest and fluids.", out) == out
+    assert metrics.FALLBACKS.value(path="openai_tts_to_gtts", reason="ConnectionError") == before + 1
+
+
+def test_metrics_endpoint_exposes_http_latency():
+    with TestClient(api.app) as client:
+        client.get("/sessions/abc/messages", params={"limit": 0})
+        resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'ai_doctor_http_request_seconds_count{method="GET",route="/sessions/{session_id}/messages",status="400"}' in body
+    assert 'ai_doctor_cache_hits_total{cache="stt_cache"}' in body
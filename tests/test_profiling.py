@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.ai_doctor import api, profiling
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling.profiler, "sample_rate", 1.0)
+    monkeypatch.setattr(profiling.profiler, "directory", str(tmp_path))
+    return profiling.profiler
+
+
+def _busy(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def test_generator_handler_is_sampled_and_rotated(profiler, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "mode", "sample")
+    monkeypatch.setattr(profiler, "keep", 2)
+
+    def handler(n):
+        for _ in range(n):
+            _busy()
+            time.sleep(0.01)
+            yield bytearray(256 * 1024)
+
+    wrapped = profiling.profile_handler(handler)
+    for _ in range(3):
+        assert len(list(wrapped(3))) == 3
+
+    reports = sorted(tmp_path.glob("*.json"))
+    assert len(reports) == 2 and len(list(tmp_path.glob("*.folded"))) == 2
+    report = json.loads(reports[-1].read_text())
+    assert report["name"] == "handler" and report["mode"] == "sample"
+    assert report["samples"] > 0
+    assert report["memory"]["peak_bytes"] >= 256 * 1024
+
+
+def test_cprofile_mode_writes_pstats(profiler, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "mode", "cprofile")
+    assert profiling.profile_handler(_busy, "busy")() == _busy()
+    (report_path,) = tmp_path.glob("*.json")
+    report = json.loads(report_path.read_text())
+    assert (tmp_path / report_path.name.replace(".json", ".prof")).exists()
+    assert any("_busy" in line for line in report["top"])
+
+
+def test_unsampled_requests_are_untouched(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling.profiler, "sample_rate", 0.0)
+    monkeypatch.setattr(profiling.profiler, "directory", str(tmp_path))
+    assert profiling.profile_handler(_busy)(10) == _busy(10)
+    assert not list(tmp_path.iterdir())
+
+
+def test_api_response_carries_profile_id(profiler, tmp_path):
+    with TestClient(api.app) as client:
+        resp = client.get("/metrics")
+    profile_id = resp.headers[profiling.HEADER]
+    (report_path,) = tmp_path.glob(f"*_{profile_id}.json")
+    report = json.loads(report_path.read_text())
+    assert report["name"] == "GET /metrics" and report["status"] == 200
+
+
+def test_api_requests_are_sampled_even_in_cprofile_mode(profiler, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "mode", "cprofile")
+    with TestClient(api.app) as client:
+        profile_id = client.get("/metrics").headers[profiling.HEADER]
+    (report_path,) = tmp_path.glob(f"*_{profile_id}.json")
+    assert json.loads(report_path.read_text())["mode"] == "sample"
+    assert not list(tmp_path.glob("*.prof")) and list(tmp_path.glob(f"*_{profile_id}.folded"))
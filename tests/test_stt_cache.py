@@ -0,0 +1,40 @@
+import time
+
+from src.ai_doctor.cache import LRUCache
+from src.ai_doctor.stt import TranscriptionCache, transcription_cache_key
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_entries=4, ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_transcription_cache_key_depends_on_options():
+    base = transcription_cache_key("abc", model="whisper-large-v3-turbo", language=None, prompt=None, response_format="json")
+    other = transcription_cache_key("abc", model="whisper-large-v3", language=None, prompt=None, response_format="json")
+    assert base != other
+    assert base == transcription_cache_key("abc", response_format="json", prompt=None, language=None, model="whisper-large-v3-turbo")
+
+
+def test_transcription_cache_disk_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "stt.sqlite")
+    TranscriptionCache(db_path=db_path).put("k", ("hello", "en"))
+    fresh = TranscriptionCache(db_path=db_path)
+    assert fresh.get("k") == ("hello", "en")
+    assert fresh.get("missing") is None
+    stats = fresh.stats()
+    assert stats["disk_hits"] == 1 and stats["misses"] == 1
@@ -0,0 +1,87 @@
+import os
+import shutil
+
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from src.ai_doctor import stt
+
+
+def _spans(chunks):
+    return [(c["start"], c["end"], c["own_start"], c["own_end"]) for c in chunks]
+
+
+def test_short_audio_is_one_chunk():
+    chunks = stt.plan_chunks(AudioSegment.silent(900), chunk_ms=1000, overlap_ms=200, split="fixed")
+    assert _spans(chunks) == [(0, 900, 0, 900)]
+    assert _spans(stt.plan_chunks(AudioSegment.silent(1000), chunk_ms=1000, split="fixed")) == [(0, 1000, 0, 1000)]
+
+
+def test_exact_multiple_has_no_empty_tail():
+    chunks = stt.plan_chunks(AudioSegment.silent(3000), chunk_ms=1000, overlap_ms=200, split="fixed")
+    assert _spans(chunks) == [(0, 1100, 0, 1000), (900, 2100, 1000, 2000), (1900, 3000, 2000, 3000)]
+    assert [c["index"] for c in chunks] == [0, 1, 2]
+
+
+def test_ragged_duration_keeps_short_last_chunk():
+    chunks = stt.plan_chunks(AudioSegment.silent(2500), chunk_ms=1000, overlap_ms=200, split="fixed")
+    assert _spans(chunks) == [(0, 1100, 0, 1000), (900, 2100, 1000, 2000), (1900, 2500, 2000, 2500)]
+    # Owned spans tile the recording exactly.
+    assert all(a["own_end"] == b["own_start"] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_silence_split_cuts_inside_pause_without_overlap():
+    tone = Sine(220).to_audio_segment(duration=800, volume=-6)
+    audio = tone + AudioSegment.silent(150) + tone + tone
+    chunks = stt.plan_chunks(audio, chunk_ms=1000, overlap_ms=200, split="silence", min_silence_ms=100)
+    first, second = chunks[0], chunks[1]
+    assert 800 <= first["own_end"] <= 950
+    assert first["end"] == first["own_end"] == second["start"] == second["own_start"]
+    with pytest.raises(ValueError):
+        stt.plan_chunks(audio, split="words")
+
+
+# One word every 500 ms, each 400 ms long.
+WORDS = [(f"w{k}", k * 500, k * 500 + 400) for k in range(10)]
+
+
+def _hears(chunk):
+    """A verbose_json reply with every word overlapping the chunk's audio, timed relative to it."""
+    segments = [
+        {"id": i, "text": f" {word}", "start": (start - chunk["start"]) / 1000, "end": (end - chunk["start"]) / 1000}
+        for i, (word, start, end) in enumerate(WORDS)
+        if start < chunk["end"] and end > chunk["start"]
+    ]
+    return {"text": " ".join(s["text"] for s in segments), "language": "english", "segments": segments}
+
+
+def test_overlap_segments_are_kept_once(monkeypatch):
+    chunks = stt.plan_chunks(AudioSegment.silent(5000), chunk_ms=2000, overlap_ms=1000, split="fixed")
+    by_path = {f"chunk_{c['index']:04d}.flac": c for c in chunks}
+    monkeypatch.setattr(stt, "_create_transcription", lambda client, *, file_path, **kw: _hears(by_path[file_path]))
+
+    parts = [stt._transcribe_chunk(None, c, f"chunk_{c['index']:04d}.flac", {}) for c in chunks]
+    # Chunks 1 and 2 hear w3/w4 and w7/w8 again in their overlap, but only the owner keeps them.
+    assert [p["text"] for p in parts] == ["w0 w1 w2 w3", "w4 w5 w6 w7", "w8 w9"]
+    assert [(p["start"], p["end"]) for p in parts] == [(0.0, 2.0), (2.0, 4.0), (4.0, 5.0)]
+    assert [s["start"] for p in parts for s in p["segments"]] == [k * 0.5 for k in range(10)]
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_chunked_transcript_has_no_duplicated_overlap_words(monkeypatch, tmp_path):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    source = str(tmp_path / "long.wav")
+    AudioSegment.silent(5000, frame_rate=16000).export(source, format="wav")
+
+    planned = []
+    real_plan = stt.plan_chunks
+    monkeypatch.setattr(stt, "plan_chunks", lambda *a, **k: planned.extend(real_plan(*a, **k)) or planned)
+    monkeypatch.setattr(
+        stt, "_create_transcription",
+        lambda client, *, file_path, **kw: _hears(planned[int(os.path.basename(file_path)[6:10])]),
+    )
+
+    text, language = stt.groq_transcribe_chunked(source, chunk_ms=2000, overlap_ms=1000, split="fixed", max_workers=3)
+    assert text.split() == [word for word, _, _ in WORDS]
+    assert language == "en"
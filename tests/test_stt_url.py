@@ -0,0 +1,48 @@
+import email
+
+import groq
+import httpx
+import pytest
+
+from src.ai_doctor import stt
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """Route a real Groq client through a mock transport and record each multipart form."""
+    forms = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raw = b"Content-Type: " + request.headers["content-type"].encode() + b"\r\n\r\n" + request.read()
+        parts = email.message_from_bytes(raw).get_payload()
+        forms.append({
+            "path": request.url.path,
+            "fields": {p.get_param("name", header="content-disposition"): p.get_payload(decode=True) for p in parts},
+        })
+        return httpx.Response(200, json={"text": "I have a headache.", "language": "english"})
+
+    client = groq.Groq(api_key="test-key", base_url="http://groq.test", http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(stt, "groq_client", lambda api_key=None: client)
+    return forms
+
+
+def test_transcribe_url_is_sent_as_form_field(captured):
+    text, _ = stt.groq_transcribe(url="https://example.test/a.mp3", use_cache=False)
+    assert text == "I have a headache."
+    (form,) = captured
+    assert form["path"].endswith("/audio/transcriptions")
+    assert form["fields"]["url"] == b"https://example.test/a.mp3" and "file" not in form["fields"]
+
+
+def test_translate_url_and_file_are_sent_as_form_fields(captured, tmp_path):
+    assert stt.groq_translate(url="https://example.test/b.mp3", prompt="medical") == "I have a headache."
+    clip = tmp_path / "clip.wav"
+    clip.write_bytes(b"RIFF fake")
+    assert stt.groq_translate(file_path=str(clip)) == "I have a headache."
+
+    by_url, by_file = captured
+    assert by_url["path"].endswith("/audio/translations")
+    assert by_url["fields"]["url"] == b"https://example.test/b.mp3" and "file" not in by_url["fields"]
+    assert by_url["fields"]["language"] == b"en" and by_url["fields"]["prompt"] == b"medical"
+    assert by_file["fields"]["file"] == b"RIFF fake" and "url" not in by_file["fields"]
+    assert by_file["fields"]["language"] == b"en"
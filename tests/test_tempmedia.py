@@ -0,0 +1,54 @@
+import os
+import time
+
+from src.ai_doctor.tempmedia import TempMediaManager
+
+
+def _write(path, size=10, age=0.0):
+    path.write_bytes(b"x" * size)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_tracked_files_expire_on_one_thread(tmp_path):
+    manager = TempMediaManager(default_ttl=0.05)
+    files = [_write(tmp_path / f"clip{i}.wav") for i in range(20)]
+    for f in files:
+        manager.track(f)
+    try:
+        assert _wait_for(lambda: not any(f.exists() for f in files))
+        assert manager.stats()["expired"] == 20
+    finally:
+        manager.stop()
+
+
+def test_disk_cap_deletes_soonest_expiring_first(tmp_path):
+    manager = TempMediaManager(default_ttl=60, max_bytes=25)
+    first = manager.track(_write(tmp_path / "a.wav"), ttl=10)
+    second = manager.track(_write(tmp_path / "b.wav"), ttl=20)
+    third = manager.track(_write(tmp_path / "c.wav"), ttl=30)
+    manager.stop()
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+    assert manager.stats()["capped"] == 1
+
+
+def test_scan_removes_stale_orphans_and_adopts_fresh_files(tmp_path):
+    stale = _write(tmp_path / "stale.wav", age=120)
+    fresh = _write(tmp_path / "fresh.wav")
+    manager = TempMediaManager()
+    manager.register_dir(tmp_path, max_age=60)
+    assert manager.scan() == 1
+    assert not stale.exists() and fresh.exists()
+    assert manager.stats()["pending"] == 1
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from src.ai_doctor import cache, tts
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch, tmp_path):
+    store = tts.TTSCache(directory=str(tmp_path / "cache"), max_bytes=1024 * 1024, ttl=60)
+    monkeypatch.setattr(tts, "tts_cache", store)
+    monkeypatch.setattr(tts, "TTS_OUTPUT_DIR", str(tmp_path / "requests"))
+    return store
+
+
+def _write(path, data=b"ID3 fake mp3"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return path
+
+
+def test_key_covers_every_synthesis_option():
+    base = tts.TTSCache.key("Rest.", "alloy", "gtts", "en")
+    assert base == tts.TTSCache.key("Rest.", "alloy", "gtts", "en", None)
+    variants = {
+        tts.TTSCache.key("Rest!", "alloy", "gtts", "en"),
+        tts.TTSCache.key("Rest.", "echo", "gtts", "en"),
+        tts.TTSCache.key("Rest.", "alloy", tts.OPENAI_TTS_MODEL, "en"),
+        tts.TTSCache.key("Rest.", "alloy", "gtts", "de"),
+        tts.TTSCache.key("Rest.", "alloy", "gtts", "en", "calm"),
+    }
+    assert base not in variants and len(variants) == 5
+
+
+def test_put_get_and_ttl_expiry(fresh_cache, tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    key = tts.TTSCache.key("Rest.", "alloy", "gtts", "en")
+    assert fresh_cache.get(key) is None
+    cached = fresh_cache.put(key, _write(str(tmp_path / "out.mp3")))
+    assert fresh_cache.get(key) == cached and os.path.exists(cached)
+    assert not os.path.exists(tmp_path / "out.mp3")  # moved, not copied
+
+    now[0] += 61
+    assert fresh_cache.get(key) is None
+    fresh_cache.sweep()
+    assert not os.path.exists(cached)
+
+
+def test_synthesize_cached_hits_and_misses(fresh_cache, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    calls = []
+    monkeypatch.setattr(tts, "text_to_speech_with_gtts", lambda text, path, lang="en": calls.append(text) or _write(path))
+    first = tts.synthesize_cached("Drink water.")
+    assert tts.synthesize_cached("Drink water.") == first
+    tts.synthesize_cached("Drink water.", lang="de")
+    assert calls == ["Drink water.", "Drink water."]
+    stats = fresh_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_fallback_audio_is_not_cached_as_openai(fresh_cache, monkeypatch):
+    class FailingClient:
+        class audio:
+            class speech:
+                class with_streaming_response:
+                    @staticmethod
+                    def create(**kwargs):
+                        raise ConnectionError("provider down")
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(tts, "OpenAI", object)
+    monkeypatch.setattr(tts, "openai_client", lambda key: FailingClient)
+    gtts_calls = []
+    monkeypatch.setattr(tts, "text_to_speech_with_gtts", lambda text, path, lang="en": gtts_calls.append(text) or _write(path))
+
+    fallback = tts.synthesize_cached("Canned reply.")
+    openai_key = tts.TTSCache.key("Canned reply.", "alloy", tts.OPENAI_TTS_MODEL, "en")
+    gtts_key = tts.TTSCache.key("Canned reply.", "alloy", "gtts", "en")
+    assert fresh_cache.get(openai_key) is None
+    assert fresh_cache.get(gtts_key) == fallback
+    # The next request retries OpenAI instead of replaying the gTTS audio.
+    tts.synthesize_cached("Canned reply.")
+    assert len(gtts_calls) == 2
+
+
+def test_sweep_only_removes_orphans_older_than_ttl(fresh_cache, tmp_path):
+    directory = tmp_path / "cache"
+    fresh = _write(str(directory / f"{'a' * 64}.mp3"))  # mid-put, or another process's entry
+    stale = _write(str(directory / f"{'b' * 64}.mp3"))
+    os.utime(stale, (0, 0))
+    key = tts.TTSCache.key("Rest.", "alloy", "gtts", "en")
+    cached = fresh_cache.put(key, _write(str(tmp_path / "out.mp3")))
+
+    assert fresh_cache.sweep() == 1
+    assert os.path.exists(fresh) and os.path.exists(cached) and not os.path.exists(stale)
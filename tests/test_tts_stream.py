@@ -0,0 +1,49 @@
+from src.ai_doctor.tts import SentenceBuffer, split_sentences
+
+
+def _feed_all(buffer, deltas):
+    out = []
+    for delta in deltas:
+        out.extend(buffer.feed(delta))
+    return out
+
+
+def test_sentences_are_released_once_terminated():
+    buffer = SentenceBuffer(min_chars=10)
+    assert buffer.feed("Drink plenty of water") == []
+    assert buffer.feed(".") == []  # terminator not yet followed by whitespace
+    assert buffer.feed(" Rest for two days! Then") == ["Drink plenty of water.", "Rest for two days!"]
+    assert buffer.flush() == ["Then"]
+    assert buffer.flush() == []
+
+
+def test_short_sentences_merge_with_the_next():
+    text = "Yes. Okay. Take ibuprofen with food twice a day. Call us if worse."
+    assert split_sentences(text, min_chars=20) == [
+        "Yes. Okay. Take ibuprofen with food twice a day.",
+        "Call us if worse.",
+    ]
+
+
+def test_abbreviations_and_initials_do_not_split():
+    deltas = ["Please book a follow-up with Dr. ", "Smith, e.g. ", "on Monday. ", "Ask for Dr. J. ", "R. Patel at the desk."]
+    buffer = SentenceBuffer(min_chars=5)
+    assert _feed_all(buffer, deltas) == ["Please book a follow-up with Dr. Smith, e.g. on Monday."]
+    assert buffer.flush() == ["Ask for Dr. J. R. Patel at the desk."]
+
+
+def test_single_letter_after_a_word_ends_the_sentence():
+    assert split_sentences("Take vitamin C. Then rest. Grade B. Hepatitis B. Vaccines help.", min_chars=5) == [
+        "Take vitamin C.",
+        "Then rest.",
+        "Grade B.",
+        "Hepatitis B.",
+        "Vaccines help.",
+    ]
+
+
+def test_trailing_fragment_is_flushed():
+    buffer = SentenceBuffer(min_chars=40)
+    assert _feed_all(buffer, ["Short one. ", "And an unterminated tail"]) == []
+    assert buffer.flush() == ["Short one. And an unterminated tail"]
+    assert split_sentences("  ", min_chars=1) == []
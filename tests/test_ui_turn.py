@@ -0,0 +1,44 @@
+from src.ai_doctor import ui
+
+
+def test_tts_failure_keeps_streaming_and_logs_turn(monkeypatch):
+    reply = ["Keep the rash clean and dry for now. ", "Apply a cool compress twice a day. ", "See a doctor if it spreads."]
+    monkeypatch.setattr(ui, "_doctor_response_stream", lambda image, text, session=None: iter(reply))
+
+    def flaky_speak(sentence):
+        if not sentence.startswith("Keep"):
+            raise ConnectionError("TTS provider down")
+        return "first.mp3"
+
+    logged = []
+    monkeypatch.setattr(ui, "_speak", flaky_speak)
+    monkeypatch.setattr(ui, "_log_turn", lambda *args: logged.append(args))
+    before = ui.metrics.STAGE_ERRORS.value(stage="tts_sentence")
+
+    steps = list(ui.process_and_log(None, "I have a rash on my arm.", "session-1"))
+    ui._db_writer.submit(lambda: None).result()
+
+    assert steps[-1][0] == "".join(reply)
+    audio = [chunk for _, chunk, _ in steps if chunk]
+    assert audio == ["first.mp3"]
+    assert ui.metrics.STAGE_ERRORS.value(stage="tts_sentence") == before + 1
+    assert logged == [("session-1", "I have a rash on my arm.", None, "".join(reply))]
+
+
+def test_failed_llm_stream_still_logs_partial_turn(monkeypatch):
+    def broken_stream(image, text, session=None):
+        yield "Rest and "
+        raise ConnectionError("LLM stream dropped")
+
+    logged = []
+    monkeypatch.setattr(ui, "_doctor_response_stream", broken_stream)
+    monkeypatch.setattr(ui, "_speak", lambda sentence: "x.mp3")
+    monkeypatch.setattr(ui, "_log_turn", lambda *args: logged.append(args))
+    turn = ui.process_and_log(None, "headache", "session-2")
+    assert next(turn)[0] == "Rest and "
+    try:
+        next(turn)
+    except ConnectionError:
+        pass
+    ui._db_writer.submit(lambda: None).result()
+    assert logged == [("session-2", "headache", None, "Rest and ")]
@@ -0,0 +1,67 @@
+import numpy as np
+from pydub import AudioSegment
+
+from src.ai_doctor.stt import speech_frames, vad_trim
+
+RATE = 16000
+
+
+def _silence(ms, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.001, RATE * ms // 1000)
+
+
+def _tone(ms, hz=220.0):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return 0.5 * np.sin(2 * np.pi * hz * t)
+
+
+def _segment(*parts):
+    samples = np.concatenate(parts)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    return AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=RATE, channels=1)
+
+
+def _loud_ms(audio):
+    """(first, last) millisecond of the tone inside ``audio``."""
+    samples = np.array(audio.get_array_of_samples()) / 32768
+    loud = np.flatnonzero(np.abs(samples) > 0.1)
+    return loud[0] * 1000 / RATE, loud[-1] * 1000 / RATE
+
+
+def test_speech_frames_marks_only_the_tone():
+    samples = np.concatenate([_silence(990), _tone(990), _silence(990, seed=1)])
+    frames = speech_frames(samples, RATE, frame_ms=30)
+    assert len(frames) == 99
+    assert not frames[:33].any() and frames[33:66].all() and not frames[66:].any()
+    assert len(speech_frames(samples[:100], RATE)) == 0
+
+
+def test_vad_trim_keeps_tone_with_padding():
+    audio = _segment(_silence(1000), _tone(1000), _silence(1000, seed=1))
+    trimmed, report = vad_trim(audio, padding_ms=150)
+    assert report["speech_runs"] == 1
+    assert report["original_ms"] == 3000
+    assert report["kept_ms"] + report["removed_ms"] == 3000
+    # One second of tone plus about 150 ms of padding on each side (frame-rounded).
+    assert 1250 <= len(trimmed) <= 1400
+    first, last = _loud_ms(trimmed)
+    assert 120 <= first <= 200
+    assert 120 <= len(trimmed) - last <= 200
+
+
+def test_vad_trim_shortens_long_pauses():
+    audio = _segment(_silence(300), _tone(500), _silence(3000, seed=1), _tone(500, hz=330), _silence(300, seed=2))
+    trimmed, report = vad_trim(audio, padding_ms=90, max_silence_ms=600)
+    assert report["speech_runs"] == 2
+    # Two tones, their padding and at most max_silence_ms of the pause remain.
+    assert 1000 <= len(trimmed) <= 1000 + 4 * 90 + 600 + 60
+    assert report["removed_ms"] >= 3000 - 600 - 2 * 90
+
+
+def test_vad_trim_leaves_all_silence_unchanged():
+    audio = _segment(_silence(2000))
+    trimmed, report = vad_trim(audio)
+    assert trimmed is audio
+    assert report["removed_ms"] == 0 and report["speech_runs"] == 0 and report["kept_ms"] == 2000
+    digital_silence = _segment(np.zeros(RATE))
+    assert vad_trim(digital_silence)[0] is digital_silence
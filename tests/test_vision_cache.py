@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from src.ai_doctor import vision
+
+MODEL = "test-model"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    vision._response_cache.clear()
+    yield
+    vision._response_cache.clear()
+
+
+def _counted(monkeypatch, reply="Keep the area clean and dry.", delay=0.0, fail=False):
+    calls = []
+
+    def fake_complete(key, messages, model):
+        calls.append(messages)
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("upstream down")
+        return reply
+
+    monkeypatch.setattr(vision, "_complete", fake_complete)
+    return calls
+
+
+def test_identical_prompts_hit_the_cache(monkeypatch):
+    calls = _counted(monkeypatch)
+    hits = vision.RESPONSE_CACHE.value(result="hit")
+    first = vision.analyze_text_query("My  arm itches", model=MODEL)
+    assert vision.analyze_text_query("my arm itches ", model=MODEL) == first
+    assert len(calls) == 1 and vision.RESPONSE_CACHE.value(result="hit") == hits + 1
+    # Different history or image means a different conversation.
+    vision.analyze_text_query("my arm itches", model=MODEL, history=[{"role": "system", "content": "x"}])
+    vision.analyze_image_with_query("my arm itches", MODEL, "data:image/png;base64,AAAA")
+    vision.analyze_image_with_query("my arm itches", MODEL, "data:image/jpeg;base64,AAAA")
+    assert len(calls) == 3
+
+
+def test_concurrent_identical_requests_share_one_call(monkeypatch):
+    calls = _counted(monkeypatch, delay=0.2)
+    coalesced = vision.RESPONSE_CACHE.value(result="coalesced")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(vision.analyze_image_with_query("rash?", MODEL, "QUJD")))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len(set(results)) == 1 and len(results) == 5
+    assert vision.RESPONSE_CACHE.value(result="coalesced") == coalesced + 4
+
+
+def test_errors_are_shared_but_not_cached(monkeypatch):
+    calls = _counted(monkeypatch, fail=True)
+    with pytest.raises(ConnectionError):
+        vision.analyze_text_query("fever", model=MODEL)
+    with pytest.raises(ConnectionError):
+        vision.analyze_text_query("fever", model=MODEL)
+    assert len(calls) == 2
+
+
+def test_stream_followers_get_the_leaders_reply(monkeypatch):
+    calls = []
+    started = threading.Event()
+
+    def fake_stream(key, messages, model):
+        calls.append(messages)
+        started.set()
+        for word in ["Rest", " and", " fluids."]:
+            time.sleep(0.05)
+            yield word
+
+    monkeypatch.setattr(vision, "_stream_completion", fake_stream)
+    follower = []
+    leader = vision.stream_text_query("cough", model=MODEL)
+    first = next(leader)
+    assert started.wait(1)
+    t = threading.Thread(target=lambda: follower.extend(vision.stream_text_query("cough", model=MODEL)))
+    t.start()
+    assert first + "".join(leader) == "Rest and fluids."
+    t.join()
+    assert follower == ["Rest and fluids."] and len(calls) == 1
+    assert list(vision.stream_text_query("Cough", model=MODEL)) == ["Rest and fluids."]
+
+    # A leader closed midway does not strand or poison later requests.
+    abandoned = vision.stream_text_query("headache", model=MODEL)
+    next(abandoned)
+    abandoned.close()
+    assert "".join(vision.stream_text_query("headache", model=MODEL)) == "Rest and fluids."
+    assert len(calls) == 3
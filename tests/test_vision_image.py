@@ -0,0 +1,77 @@
+import base64
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from src.ai_doctor import vision
+
+
+def _noise(width, height, mode="RGB", seed=0):
+    channels = len(mode)
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, channels), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def _decode(data_url):
+    header, b64 = data_url.split(",", 1)
+    return header, Image.open(BytesIO(base64.b64decode(b64)))
+
+
+def test_large_photo_is_downscaled_to_max_side(tmp_path):
+    path = tmp_path / "photo.jpg"
+    _noise(3000, 2000).save(path, quality=95)
+    data, mime, report = vision.prepare_image(str(path), max_side=1280)
+    assert mime == "image/jpeg" and report["format"] == "JPEG"
+    assert report["original_size"] == (3000, 2000) and report["encoded_size"] == (1280, 853)
+    assert report["encoded_bytes"] == len(data) < report["original_bytes"]
+    header, img = _decode(vision.encode_image_data_url(str(path), max_side=1280))
+    assert header == "data:image/jpeg;base64" and img.size == (1280, 853)
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    path = tmp_path / "sideways.jpg"
+    img = _noise(200, 100)
+    exif = img.getexif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise for display
+    img.save(path, exif=exif)
+    _, _, report = vision.prepare_image(str(path))
+    assert report["original_size"] == (200, 100) and report["encoded_size"] == (100, 200)
+    _, out = _decode(vision.encode_image_data_url(str(path)))
+    assert out.size == (100, 200) and out.getexif().get(0x0112, 1) == 1
+
+
+def test_png_with_alpha_becomes_jpeg_on_white(tmp_path):
+    path = tmp_path / "cutout.png"
+    img = _noise(1600, 1600, "RGBA")
+    alpha = np.full((1600, 1600), 255, dtype=np.uint8)
+    alpha[:400, :400] = 0  # transparent corner
+    img.putalpha(Image.fromarray(alpha))
+    img.save(path)
+    header, out = _decode(vision.encode_image_data_url(str(path), max_side=800))
+    assert header == "data:image/jpeg;base64"
+    assert out.mode == "RGB" and out.size == (800, 800)
+    assert all(channel > 240 for channel in out.getpixel((50, 50)))
+
+
+def test_png_format_keeps_alpha(tmp_path):
+    path = tmp_path / "cutout.png"
+    _noise(1000, 500, "RGBA").save(path)
+    header, out = _decode(vision.encode_image_data_url(str(path), max_side=400, fmt="PNG"))
+    assert header == "data:image/png;base64"
+    assert out.mode == "RGBA" and out.size == (400, 200)
+
+
+def test_small_image_is_sent_as_is(tmp_path):
+    path = tmp_path / "icon.png"
+    Image.new("RGBA", (32, 32), (200, 40, 40, 128)).save(path)
+    data, mime, report = vision.prepare_image(str(path))
+    assert data == path.read_bytes() and mime == "image/png" and report["format"] == "original"
+    assert vision.encode_image_data_url(str(path)).startswith("data:image/png;base64,")
+
+
+def test_unreadable_image_is_sent_unprocessed(tmp_path):
+    path = tmp_path / "broken.gif"
+    path.write_bytes(b"GIF89a not really an image")
+    data, mime, report = vision.prepare_image(str(path))
+    assert data == path.read_bytes() and mime == "image/gif" and report["format"] is None